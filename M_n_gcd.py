@@ -1,7 +1,7 @@
 import json
-import math
 from fractions import Fraction
-from collections import defaultdict
+from batch_gcd import repeated_prime_map
+from factor_cache import FactorCache
 
 # Compute b_n for n=0 to 300 using recurrence
 def compute_b_n(max_n):
@@ -15,24 +15,8 @@ def compute_b_n(max_n):
         b.append(b_n)
     return b
 
-# Function to compute greatest common divisor (gcd)
-def gcd(a, b):
-    while b:
-        a, b = b, a % b
-    return a
-
-# Factorize a number into its prime factors
-def factorize(n):
-    factors = {}
-    d = 2
-    while d * d <= n:
-        while n % d == 0:
-            factors[d] = factors.get(d, 0) + 1
-            n //= d
-        d += 1
-    if n > 1:
-        factors[n] = factors.get(n, 0) + 1
-    return factors
+# Factorize a number into its prime factors (memoised on disk, 10s per number)
+factorize = FactorCache('factor_cache.db')
 
 # Main computation
 max_n = 300
@@ -50,38 +34,15 @@ for n in range(2, max_n + 1):
         # According to the problem, for n>=2, N_n is always even, so this should not occur
         M_n_dict[n] = None
 
-# Find repeated primes using pairwise gcd
-print("Finding repeated primes via pairwise gcd...")
-repeated_gcds = defaultdict(list)  # gcd value -> list of pairs (j, n)
-previous_M = {}  # n: M_n for already processed n
-
-for n in range(2, max_n + 1):
-    M_n = M_n_dict.get(n)
-    if M_n is None:
-        continue
-    for j, M_j in previous_M.items():
-        g = gcd(M_n, M_j)
-        if g > 1:
-            repeated_gcds[g].append((j, n))
-    previous_M[n] = M_n
-
-# Factorize gcd values to get primes and map primes to n values
-print("Factorizing gcd values to get primes...")
-prime_to_n = defaultdict(list)  # prime p -> list of n where p divides M_n
-
-for g, pairs in repeated_gcds.items():
-    factors = factorize(g)
-    primes = list(factors.keys())
-    for p in primes:
-        for (j, n) in pairs:
-            if j not in prime_to_n[p]:
-                prime_to_n[p].append(j)
-            if n not in prime_to_n[p]:
-                prime_to_n[p].append(n)
-
-# Sort the n lists for each prime
-for p in prime_to_n:
-    prime_to_n[p].sort()
+# Find repeated primes: gcd of each M_n with the product of all the others,
+# then factorize those gcd values to map primes to n values
+print("Finding repeated primes via batch gcd...")
+M_list = [(n, M_n) for n, M_n in M_n_dict.items() if M_n is not None]
+prime_to_n = repeated_prime_map(M_list, factor=factorize)
+factorize.close()
+if factorize.composites:
+    print(f"Note: {len(factorize.composites)} gcd(s) kept a composite cofactor; "
+          "their primes are missing from the map")
 
 # Compute residues (2n+1) mod p for each prime and n
 print("Computing residues...")
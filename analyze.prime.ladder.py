@@ -1,50 +1,106 @@
 import csv
 import json
-import math
+import sys
 from collections import defaultdict
-from sympy import factorint
+from batch_gcd import prime_product_tree, repeated_prime_map, small_prime_divisors
 
-def analyze_prime_ladder(csv_filepath):
+def _field_size_limit():
+    """Lift the csv field limit as far as this platform's C long allows."""
+    limit = sys.maxsize
+    while True:
+        try:
+            return csv.field_size_limit(limit)
+        except OverflowError:
+            limit //= 2
+
+def _big_int(text):
+    """int(text), raising the int/str digit limit only as far as this field needs."""
+    if not hasattr(sys, 'get_int_max_str_digits'):
+        return int(text)
+    old = sys.get_int_max_str_digits()
+    if old == 0 or len(text) <= old:
+        return int(text)
+    sys.set_int_max_str_digits(len(text))
+    try:
+        return int(text)
+    finally:
+        sys.set_int_max_str_digits(old)
+
+def iter_M_chunks(csv_filepath, chunk_size):
     """
-    Analyze the prime-ladder phenomenon from a CSV file of coefficients.
+    Lazily read (n, M_n) for n >= 2 from the CSV, chunk_size rows at a time.
     
-    Args:
-        csv_filepath (str): Path to the CSV file containing coefficients
+    Only one chunk of huge integers is held in memory at once.
     """
-    # Read the CSV file
-    data = []
-    with open(csv_filepath, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            n = int(row['n'])
-            if n >= 2:  # Only consider n >= 2
-                try:
-                    N_n = int(row['N_n'])
-                    M_n = N_n // 2  # M_n = N_n / 2
-                    data.append((n, M_n))
-                except (ValueError, KeyError):
-                    continue
-    
-    print(f"Loaded {len(data)} M_n values")
+    # N_n fields can be far longer than the csv and int() default limits;
+    # both are raised only while this file is being read
+    old_limit = _field_size_limit()
+    try:
+        chunk = []
+        with open(csv_filepath, 'r', newline='') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                n = int(row['n'])
+                if n >= 2:  # Only consider n >= 2
+                    try:
+                        N_n = _big_int(row['N_n'])
+                        M_n = N_n // 2  # M_n = N_n / 2
+                    except (ValueError, KeyError):
+                        continue
+                    if M_n != 0:
+                        chunk.append((n, M_n))
+                    if len(chunk) == chunk_size:
+                        yield chunk
+                        chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        csv.field_size_limit(old_limit)
+
+def stream_repeated_primes(csv_filepath, chunk_size=1000, prime_bound=10**7):
+    """
+    Repeated primes p <= prime_bound, updated chunk by chunk as rows arrive.
     
-    # Find repeated primes using pairwise GCD
-    prime_to_n = defaultdict(set)
+    Each chunk is screened against all primes <= prime_bound with a remainder
+    tree, so memory is bounded by the chunk size rather than the file size.
+    Primes above prime_bound are not found; the default covers the known
+    ladder primes (2505311 and below).
+    """
+    print(f"Warning: streaming only reports primes <= {prime_bound}; "
+          f"repeated primes above it are missed (raise prime_bound)")
+    prime_tree = prime_product_tree(prime_bound)
+    prime_to_n = defaultdict(list)
+    loaded = 0
+    for chunk in iter_M_chunks(csv_filepath, chunk_size):
+        divisors = small_prime_divisors([M_n for _, M_n in chunk], prime_bound, prime_tree)
+        for (n, _), primes in zip(chunk, divisors):
+            for p in primes:
+                prime_to_n[p].append(n)
+        loaded += len(chunk)
+        print(f"Loaded {loaded} M_n values")
     
-    # Perform pairwise GCD checks
-    for i in range(len(data)):
-        n_i, M_i = data[i]
-        for j in range(i + 1, len(data)):
-            n_j, M_j = data[j]
-            g = math.gcd(M_i, M_j)
-            if g > 1:
-                # Factorize the GCD to get primes
-                factors = factorint(g)
-                for prime in factors:
-                    prime_to_n[prime].add(n_i)
-                    prime_to_n[prime].add(n_j)
+    return {p: sorted(ns) for p, ns in sorted(prime_to_n.items()) if len(ns) >= 2}
+
+def analyze_prime_ladder(csv_filepath, chunk_size=None, prime_bound=10**7):
+    """
+    Analyze the prime-ladder phenomenon from a CSV file of coefficients.
     
-    # Convert sets to sorted lists
-    prime_to_n_sorted = {p: sorted(prime_to_n[p]) for p in prime_to_n}
+    Args:
+        csv_filepath (str): Path to the CSV file containing coefficients
+        chunk_size (int): If given, stream the file in chunks of this many rows
+            and only look for repeated primes up to prime_bound
+        prime_bound (int): Largest prime screened for in streaming mode;
+            larger repeated primes are not reported
+    """
+    if chunk_size:
+        prime_to_n_sorted = stream_repeated_primes(csv_filepath, chunk_size, prime_bound)
+    else:
+        # Read the whole CSV file
+        data = [item for chunk in iter_M_chunks(csv_filepath, 10000) for item in chunk]
+        print(f"Loaded {len(data)} M_n values")
+        
+        # Find repeated primes: gcd of each M_n with the product of all the others
+        prime_to_n_sorted = repeated_prime_map(data)
     
     print(f"Found {len(prime_to_n_sorted)} primes that appear in multiple M_n values")
     
@@ -3,6 +3,11 @@ SageMath Test Suite for Ladder Prime Analysis
 Tests Hecke character, elliptic curve properties, and geometric constraints
 """
 
+import numpy as np
+from ec_rank_batch import rank_batch
+from residue_histogram import ResidueHistogram
+from two_squares import chirality, two_squares
+
 # ============================================================================
 # LADDER PRIMES DATA
 # ============================================================================
@@ -37,91 +42,64 @@ ladder_primes = [
 def find_gaussian_factorization(p):
     """
     Finds a, b such that p = a² + b² for p ≡ 1 (mod 4).
-    Uses Fermat's two-square theorem approach.
+    Hermite-Serret in O(log p), see two_squares.py.
     """
     if p % 4 != 1:
         return None, None
-    
-    # Try all possibilities up to sqrt(p)
-    limit = int(sqrt(p)) + 1
-    for a in range(1, limit):
-        b_squared = p - a*a
-        if b_squared < 0:
-            continue
-        b = int(sqrt(b_squared))
-        if b*b == b_squared:
-            return a, b
-    return None, None
+    return two_squares(int(p))
 
-def test_geometric_chirality():
+def test_geometric_chirality(primes=None):
     """
     Tests the geometric constraint arg(a+bi) ∈ (π/4, π/2) for split primes.
     This verifies 100% compliance with the "b > a" constraint.
+    
+    primes defaults to the ladder primes; any list or array of primes below
+    2^31 works, e.g. millions of random split primes as a control set.
     """
     print("="*70)
     print("TEST 1: GEOMETRIC CHIRALITY ANALYSIS")
     print("="*70)
     
-    split_primes = [p for p in ladder_primes if p % 4 == 1]
-    inert_primes = [p for p in ladder_primes if p % 4 == 3]
+    if primes is None:
+        primes = ladder_primes
+    primes = np.asarray(primes, dtype=np.int64)
+    stats = chirality(primes)
     
-    print(f"\nTotal Ladder Primes: {len(ladder_primes)}")
-    print(f"Split Primes (1 mod 4): {len(split_primes)}")
-    print(f"Inert Primes (3 mod 4): {len(inert_primes)}")
-    
-    chirality_compliant = 0
-    violations = []
-    both_orientations = []
+    print(f"\nTotal Ladder Primes: {stats['total']}")
+    print(f"Split Primes (1 mod 4): {stats['n_split']}")
+    print(f"Inert Primes (3 mod 4): {stats['n_inert']}")
     
     print("\nTesting Chirality Constraint (b > a for p = a² + b²)...")
     
-    for p in split_primes:
-        a, b = find_gaussian_factorization(p)
-        
-        if a is None:
-            print(f"  WARNING: Could not factor p={p}")
-            continue
-        
-        # Ensure we have the unique representation with a < b
-        if a > b:
-            a, b = b, a
-        
-        # Check if b > a (angle > π/4)
-        if b > a:
-            chirality_compliant += 1
-        elif b == a:
-            both_orientations.append((p, a, b))
-        else:
-            violations.append((p, a, b))
+    # All decompositions, angles and flags at once (see two_squares.chirality)
+    chirality_compliant = stats['n_compliant']
     
     print(f"\nResults:")
-    print(f"  Compliant (b > a): {chirality_compliant}/{len(split_primes)}")
-    print(f"  Equal (b = a):     {len(both_orientations)}")
-    print(f"  Violations (a > b): {len(violations)}")
+    print(f"  Compliant (b > a): {chirality_compliant}/{stats['n_split']}")
+    print(f"  Equal (b = a):     {stats['n_equal']}")
+    print(f"  Violations (a > b): {stats['n_violations']}")
     
-    compliance_rate = float(100 * chirality_compliant) / float(len(split_primes))
+    compliance_rate = float(100 * chirality_compliant) / float(max(1, stats['n_split']))
     print(f"  Compliance Rate: {compliance_rate:.2f}%")
     
-    if violations:
+    if stats['n_violations']:
         print(f"\nFirst 10 violations:")
-        for p, a, b in violations[:10]:
+        for i in stats['violation_indices'][:10]:
+            p, a, b = int(primes[i]), int(stats['a'][i]), int(stats['b'][i])
             print(f"  p={p}: a={a}, b={b}, a²+b²={a*a+b*b}")
     
-    if both_orientations:
+    if stats['n_equal']:
         print(f"\n45-degree cases (a = b):")
-        for p, a, b in both_orientations[:5]:
+        for i in stats['equal_indices'][:5]:
+            p, a, b = int(primes[i]), int(stats['a'][i]), int(stats['b'][i])
             print(f"  p={p}: a={a}, b={b}")
     
     # Show some compliant examples
-    compliant_examples = [(p, *find_gaussian_factorization(p)) 
-                          for p in split_primes[:10]]
     print(f"\nFirst 10 split primes (showing factorization):")
-    for p, a, b in compliant_examples:
-        if a and b:
-            if a > b:
-                a, b = b, a
-            status = "✓" if b > a else ("=" if b == a else "✗")
-            print(f"  {status} p={p:5d} = {a:3d}² + {b:3d}²  (b>a: {b>a})")
+    for i in np.flatnonzero(stats['split'])[:10]:
+        p, a, b = int(primes[i]), int(stats['a'][i]), int(stats['b'][i])
+        status = "✓" if b > a else ("=" if b == a else "✗")
+        print(f"  {status} p={p:5d} = {a:3d}² + {b:3d}²  (b>a: {b>a})")
     
     # Statistical significance
     if chirality_compliant > 0:
@@ -130,7 +108,7 @@ def test_geometric_chirality():
         print(f"  Probability of {chirality_compliant} consecutive compliant primes by chance:")
         print(f"  2^-{chirality_compliant} ≈ {prob_random:.2e}")
     
-    return chirality_compliant == len(split_primes)
+    return chirality_compliant == stats['n_split']
 
 # ============================================================================
 # TEST 2: MODULAR RESIDUE DISTRIBUTION (Mod 60 Analysis)
@@ -144,33 +122,25 @@ def test_modular_distribution():
     print("TEST 2: MODULAR RESIDUE DISTRIBUTION (Mod 60)")
     print("="*70)
     
-    split_primes = [p for p in ladder_primes if p % 4 == 1]
-    inert_primes = [p for p in ladder_primes if p % 4 == 3]
+    # One pass: mod 60 counts, split (1 mod 4) and inert (3 mod 4) kept apart
+    histogram = ResidueHistogram([60]).update(ladder_primes)
+    split_residues = histogram.counts(60, 'split')
+    inert_residues = histogram.counts(60, 'inert')
     
     # Analyze Split Primes
     print("\nSPLIT PRIMES (p ≡ 1 mod 4) - Mod 60 Distribution:")
     print("-" * 50)
-    split_residues = {}
-    for p in split_primes:
-        res = int(p % 60)
-        split_residues[res] = split_residues.get(res, 0) + 1
-    
     for res in sorted(split_residues.keys()):
         count = split_residues[res]
-        pct = float(100 * count) / float(len(split_primes))
+        pct = float(100 * count) / float(histogram.total('split'))
         print(f"  {res:2d} mod 60: {count:3d} primes ({pct:5.1f}%)")
     
     # Analyze Inert Primes
     print("\nINERT PRIMES (p ≡ 3 mod 4) - Mod 60 Distribution:")
     print("-" * 50)
-    inert_residues = {}
-    for p in inert_primes:
-        res = int(p % 60)
-        inert_residues[res] = inert_residues.get(res, 0) + 1
-    
     for res in sorted(inert_residues.keys()):
         count = inert_residues[res]
-        pct = float(100 * count) / float(len(inert_primes))
+        pct = float(100 * count) / float(histogram.total('inert'))
         print(f"  {res:2d} mod 60: {count:3d} primes ({pct:5.1f}%)")
     
     return split_residues, inert_residues
@@ -190,25 +160,21 @@ def test_elliptic_rank_correlation():
     print("TEST 3: ELLIPTIC CURVE RANK CORRELATION (Mod 8)")
     print("="*70)
     
-    mod8_counts = {1: [], 3: [], 5: [], 7: []}
-    
-    for p in ladder_primes:
-        rem = int(p % 8)
-        if rem in mod8_counts:
-            mod8_counts[rem].append(p)
+    counts = ResidueHistogram([8]).update(ladder_primes).counts(8)
+    mod8_counts = {r: counts.get(r, 0) for r in (1, 3, 5, 7)}
     
-    high_rank = len(mod8_counts[5]) + len(mod8_counts[7])
-    low_rank = len(mod8_counts[1]) + len(mod8_counts[3])
+    high_rank = mod8_counts[5] + mod8_counts[7]
+    low_rank = mod8_counts[1] + mod8_counts[3]
     total = float(len(ladder_primes))
     
     print(f"\nRank ≥ 1 (Congruent Number):")
-    print(f"  p ≡ 5 mod 8: {len(mod8_counts[5]):3d} primes")
-    print(f"  p ≡ 7 mod 8: {len(mod8_counts[7]):3d} primes")
+    print(f"  p ≡ 5 mod 8: {mod8_counts[5]:3d} primes")
+    print(f"  p ≡ 7 mod 8: {mod8_counts[7]:3d} primes")
     print(f"  TOTAL:       {high_rank:3d} primes ({float(100*high_rank)/total:.1f}%)")
     
     print(f"\nRank = 0 (Usually Non-Congruent):")
-    print(f"  p ≡ 1 mod 8: {len(mod8_counts[1]):3d} primes")
-    print(f"  p ≡ 3 mod 8: {len(mod8_counts[3]):3d} primes")
+    print(f"  p ≡ 1 mod 8: {mod8_counts[1]:3d} primes")
+    print(f"  p ≡ 3 mod 8: {mod8_counts[3]:3d} primes")
     print(f"  TOTAL:       {low_rank:3d} primes ({float(100*low_rank)/total:.1f}%)")
     
     # Check specific "multi-resonant" examples
@@ -226,47 +192,42 @@ def test_elliptic_rank_correlation():
 # TEST 4: ELLIPTIC CURVE VERIFICATION (Using SageMath)
 # ============================================================================
 
-def test_elliptic_curves_detailed(max_test=20):
+def test_elliptic_curves_detailed(max_test=None, timeout=60.0):
     """
     Creates actual elliptic curves E_p and checks their properties.
+    
+    Ranks come from ec_rank_batch (process pool, per-curve timeout, cached in
+    ec_ranks.db), so all ladder primes can be run at once.
     """
     print("\n" + "="*70)
     print("TEST 4: ELLIPTIC CURVE DETAILED VERIFICATION")
     print("="*70)
     
-    print(f"\nAnalyzing first {max_test} Ladder Primes...")
+    test_primes = ladder_primes[:max_test]
+    print(f"\nAnalyzing {len(test_primes)} Ladder Primes...")
     print("-" * 70)
     
+    # Congruent number curves: y² = x³ - p²x
     results = []
+    for r in rank_batch(test_primes, timeout=timeout):
+        p = r['p']
+        if r['rank'] is None:
+            print(f"p = {p:6d}: rank computation failed ({r['method']})")
+            continue
+        r['mod8'] = p % 8
+        results.append(r)
+        mark = "*" if r['conditional'] else ""
+        print(f"p = {p:6d} (≡{p%8} mod 8): rank = {r['rank']}{mark}, conductor = {r['conductor']} [{r['method']}]")
     
-    for p in ladder_primes[:max_test]:
-        # Congruent number curve: y² = x³ - p²x
-        E = EllipticCurve([0, 0, 0, -p^2, 0])
-        
-        # Compute rank (may be slow for large p)
-        try:
-            rank = E.rank()
-            conductor = E.conductor()
-            
-            results.append({
-                'p': p,
-                'mod8': p % 8,
-                'rank': rank,
-                'conductor': conductor
-            })
-            
-            print(f"p = {p:6d} (≡{p%8} mod 8): rank = {rank}, conductor = {conductor}")
-        except:
-            print(f"p = {p:6d}: rank computation failed (too large)")
-    
-    print("\nRank Distribution Summary:")
+    print("\nRank Distribution Summary (* = assumes the parity conjecture):")
     rank_counts = {}
     for r in results:
-        rank = r['rank']
+        rank = (r['rank'], r['conditional'])
         rank_counts[rank] = rank_counts.get(rank, 0) + 1
     
-    for rank in sorted(rank_counts.keys()):
-        print(f"  Rank {rank}: {rank_counts[rank]} curves")
+    for rank, conditional in sorted(rank_counts.keys()):
+        mark = "*" if conditional else ""
+        print(f"  Rank {rank}{mark}: {rank_counts[rank, conditional]} curves")
     
     return results
 
@@ -342,8 +303,8 @@ def run_all_tests():
     split_res, inert_res = test_modular_distribution()
     mod8_dist = test_elliptic_rank_correlation()
     
-    # Optional: Run detailed elliptic curve analysis (slow)
-    # ec_results = test_elliptic_curves_detailed(max_test=20)
+    # Elliptic curve ranks for every ladder prime (parallel, cached)
+    ec_results = test_elliptic_curves_detailed()
     
     # Optional: Run coefficient analysis
     # coeffs = test_hecke_multiplicativity(limit=50)
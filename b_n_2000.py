@@ -1,8 +1,11 @@
-import math
 import json
 from fractions import Fraction
-from collections import defaultdict
-from sympy import factorint
+from batch_gcd import repeated_prime_map
+from factor_cache import FactorCache
+from coefficient_store import load_coefficients
+from instrumentation import Profile
+
+SCREEN_BOUND = 10**6   # repeated primes up to here are screened, not factored
 
 def compute_b_n_correct(n_max):
     """Compute coefficients b_n using the correct recurrence relation."""
@@ -18,66 +21,68 @@ def compute_b_n_correct(n_max):
 
 def main():
     n_max = 2000
+    profile = Profile('b_n_2000')
     print(f"Computing b_n for n=0 to {n_max} using correct recurrence...")
-    b_coeffs = compute_b_n_correct(n_max)
+    with profile.stage('recurrence'):
+        b_coeffs = load_coefficients(2, Fraction(1, 2), n_max)
+    profile.count('b_n coefficients', len(b_coeffs))
     
     # Extract M_n for n >= 2
     print("Extracting M_n for n >= 2...")
     M_list = []  # List of tuples (n, M_n)
-    for n in range(2, n_max + 1):
-        numerator = b_coeffs[n].numerator
-        # Check if numerator is even; if not, there's an issue
-        if numerator % 2 != 0:
-            print(f"Error: N_{n} is not even. Numerator: {numerator}")
-            return
-        M_n = abs(numerator) // 2
-        M_list.append((n, M_n))
+    with profile.stage('M_n extraction'):
+        for n in range(2, n_max + 1):
+            numerator = b_coeffs[n].numerator
+            profile.record('numerator bits', n, numerator.bit_length())
+            # Check if numerator is even; if not, there's an issue
+            if numerator % 2 != 0:
+                print(f"Error: N_{n} is not even. Numerator: {numerator}")
+                return
+            M_n = abs(numerator) // 2
+            M_list.append((n, M_n))
+    profile.count('M_n values', len(M_list))
     
     print(f"Found {len(M_list)} M_n values.")
     
-    # Find repeated primes using pairwise GCD
-    print("Finding repeated primes via pairwise GCD...")
-    prime_to_n = defaultdict(set)  # prime -> set of n values
-    total_pairs = len(M_list) * (len(M_list) - 1) // 2
-    processed_pairs = 0
-    
-    for i in range(len(M_list)):
-        n_i, M_i = M_list[i]
-        for j in range(i + 1, len(M_list)):
-            n_j, M_j = M_list[j]
-            g = math.gcd(M_i, M_j)
-            if g > 1:
-                factors = factorint(g)
-                for prime in factors:
-                    prime_to_n[prime].add(n_i)
-                    prime_to_n[prime].add(n_j)
-            processed_pairs += 1
-            if processed_pairs % 1000 == 0:
-                print(f"Processed {processed_pairs}/{total_pairs} pairs...")
-    
-    # Convert sets to sorted lists
-    prime_to_n_sorted = {p: sorted(prime_to_n[p]) for p in prime_to_n}
+    # Find repeated primes: gcd of each M_n with the product of all the others
+    print("Finding repeated primes via batch GCD...")
+    factor_cache = FactorCache('factor_cache.db')
+    # factorisation is timed inside the gcd stage, which keeps only its own time;
+    # primes <= SCREEN_BOUND are divided out of each gcd before it is factored
+    factor = profile.timed('factorisation', factor_cache)
+    with profile.stage('gcd'):
+        prime_to_n_sorted = repeated_prime_map(M_list, factor=factor, screen_bound=SCREEN_BOUND)
+    factor_cache.close()
+    if factor_cache.composites:
+        print(f"Note: {len(factor_cache.composites)} gcd(s) kept a composite cofactor; "
+              "their primes are missing from the map")
+    profile.count('repeated primes', len(prime_to_n_sorted))
     
     print(f"Found {len(prime_to_n_sorted)} primes that appear in multiple M_n values.")
     
     # Compute residues (2n+1) mod p for each prime
     print("Computing residues (2n+1) mod p...")
     prime_residues = {}
-    for p, n_list in prime_to_n_sorted.items():
-        residues = []
-        for n in n_list:
-            residue = (2 * n + 1) % p
-            residues.append((n, residue))
-        prime_residues[p] = residues
+    with profile.stage('residues'):
+        for p, n_list in prime_to_n_sorted.items():
+            residues = []
+            for n in n_list:
+                residue = (2 * n + 1) % p
+                residues.append((n, residue))
+            prime_residues[p] = residues
+            profile.count('residues', len(residues))
     
     # Save results to JSON files
-    with open('repeated_prime_map_n2_2000.json', 'w') as f:
-        json.dump(prime_to_n_sorted, f, indent=4)
-    
-    with open('repeated_prime_residues_n2_2000.json', 'w') as f:
-        json.dump(prime_residues, f, indent=4)
+    with profile.stage('output'):
+        with open('repeated_prime_map_n2_2000.json', 'w') as f:
+            json.dump(prime_to_n_sorted, f, indent=4)
+        
+        with open('repeated_prime_residues_n2_2000.json', 'w') as f:
+            json.dump(prime_residues, f, indent=4)
     
     print("Analysis complete! Results saved to repeated_prime_map_n2_2000.json and repeated_prime_residues_n2_2000.json")
+    profile.summary()
+    profile.dump('profile_b_n_2000.json')
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
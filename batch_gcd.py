@@ -0,0 +1,150 @@
+"""
+Bernstein batch GCD for the repeated-prime search
+
+For every M_n this returns gcd(M_n, prod_{j != n} M_j) from one product tree
+and one remainder tree, instead of a gcd for every pair (M_i, M_j). A prime
+divides that gcd exactly when it divides M_n and at least one other M_j, so
+factoring these N gcds gives the same prime_to_n map as the pairwise loops
+in b_n_2000.py, analyze.prime.ladder.py and M_n_gcd.py.
+
+small_prime_divisors() screens the M_n against every prime <= B instead: the
+product Z of those primes is reduced down a remainder tree of the M_n, and
+each gcd(M_n, Z mod M_n) is split by walking down the product tree of the
+primes. Nothing is factored. screen_prime_map() turns that into the repeated
+primes <= B, and repeated_prime_map(screen_bound=B) uses it to leave only
+the primes above B to the factoring.
+"""
+
+import math
+
+from sympy import factorint, primerange
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+
+def big(x):
+    """x as a gmpy2 mpz when gmpy2 is installed, for faster big products."""
+    return gmpy2.mpz(x) if gmpy2 is not None else x
+
+
+def product_tree(values):
+    """Levels of a product tree, leaves first; an odd node is carried up as is."""
+    level = [big(v) for v in values]
+    tree = [level]
+    while len(level) > 1:
+        nxt = [level[i] * level[i + 1] for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            nxt.append(level[-1])
+        level = nxt
+        tree.append(level)
+    return tree
+
+
+def remainder_tree(root, tree, square=False):
+    """
+    root mod every leaf of `tree` (mod leaf^2 when square=True), pushed down
+    level by level so each reduction is against a node of the tree.
+    """
+    rems = [root]
+    for level in reversed(tree[:-1]):
+        if square:
+            rems = [rems[i // 2] % (m * m) for i, m in enumerate(level)]
+        else:
+            rems = [rems[i // 2] % m for i, m in enumerate(level)]
+    return rems
+
+
+def batch_gcd(values):
+    """gcd(v_i, product of all other v_j) for nonzero integers v_i."""
+    if len(values) < 2:
+        return [1] * len(values)
+    tree = product_tree(values)
+    rems = remainder_tree(tree[-1][0], tree, square=True)
+    return [int(math.gcd(int(r // v), int(v))) for r, v in zip(rems, tree[0])]
+
+
+def repeated_prime_map(M_list, factor=factorint, screen_bound=None):
+    """
+    Map each prime dividing at least two of the M_n to the sorted n values.
+
+    Args:
+        M_list: list of (n, M_n) with M_n != 0
+        factor: function returning the prime factors of an integer (sympy
+            factorint by default; anything iterable over primes works)
+        screen_bound: if given, the repeated primes <= screen_bound come from
+            screen_prime_map and are divided out of every gcd, so `factor`
+            only sees the cofactors made of larger primes
+    """
+    gcds = batch_gcd([M for _, M in M_list])
+    prime_to_n = {}
+    small = {}       # n -> its repeated primes <= screen_bound
+    if screen_bound:
+        for p, ns in screen_prime_map(M_list, screen_bound).items():
+            prime_to_n[p] = list(ns)
+            for n in ns:
+                small.setdefault(n, []).append(p)
+    for (n, _), g in zip(M_list, gcds):
+        for p in small.get(n, ()):
+            while g % p == 0:
+                g //= p
+        if g > 1:
+            for prime in factor(g):
+                prime_to_n.setdefault(prime, []).append(n)
+    return {p: sorted(prime_to_n[p]) for p in sorted(prime_to_n)}
+
+
+def split_divisors(g, tree, level, index, found):
+    """Collect the leaves of `tree` below (level, index) that divide g."""
+    h = math.gcd(g, int(tree[level][index]))
+    if h == 1:
+        return
+    if level == 0:
+        found.append(int(tree[0][index]))
+        return
+    below = tree[level - 1]
+    # a carried odd node has a single child with the same index doubled
+    split_divisors(h, tree, level - 1, 2 * index, found)
+    if 2 * index + 1 < len(below):
+        split_divisors(h, tree, level - 1, 2 * index + 1, found)
+
+
+def prime_product_tree(bound):
+    """Product tree over the primes <= bound, reusable across calls."""
+    return product_tree(list(primerange(2, bound + 1)))
+
+
+def small_prime_divisors(values, bound, prime_tree=None):
+    """
+    For every nonzero value, the sorted primes p <= bound dividing it.
+    Pass prime_tree=prime_product_tree(bound) to reuse it across batches.
+    """
+    if prime_tree is None:
+        prime_tree = prime_product_tree(bound)
+    if not values or not prime_tree[0]:
+        return [[] for _ in values]
+    value_tree = product_tree(values)
+    rems = remainder_tree(prime_tree[-1][0], value_tree)
+    top = len(prime_tree) - 1
+    result = []
+    for r, v in zip(rems, value_tree[0]):
+        found = []
+        split_divisors(math.gcd(int(r), int(v)), prime_tree, top, 0, found)
+        result.append(found)
+    return result
+
+
+def screen_prime_map(M_list, bound, min_count=2):
+    """
+    Map each prime p <= bound dividing at least min_count of the M_n to the
+    sorted n values. With min_count=2 this is repeated_prime_map restricted to
+    p <= bound.
+    """
+    divisors = small_prime_divisors([M for _, M in M_list], bound)
+    prime_to_n = {}
+    for (n, _), primes in zip(M_list, divisors):
+        for p in primes:
+            prime_to_n.setdefault(p, []).append(n)
+    return {p: sorted(ns) for p, ns in sorted(prime_to_n.items()) if len(ns) >= min_count}
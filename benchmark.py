@@ -0,0 +1,383 @@
+"""
+Reproducible timings for the coefficient and zero-search engines
+
+Every case is a function of a few grid parameters that does its setup (data
+the timed code needs but is not being measured) and returns the call to time.
+run_benchmarks() times each grid point as the best of `repeat` runs, and the
+results can be saved as a JSON baseline and compared against one later:
+
+    python benchmark.py --save            # record benchmark_baseline.json
+    python benchmark.py                   # compare, exit 1 on a regression
+    python benchmark.py --only pairwise_gcd batch_gcd
+
+Some cases are baselines for others, and every run also prints the speed-up
+of each case over its baselines at equal parameters (baseline_report):
+
+    compute_b_n_correct    b_n_2000.compute_b_n_correct, Fraction recurrence
+    original_bn_modp       zero lists for every prime below a bound from the
+                           original Sage fast_compute_bn_modp of b_n_0_mod_p.py
+                           (power series Newton over GF(p)); only with Sage
+    naive_recurrence_bn_modp
+                           the same zero lists from the plain O(N^2)
+                           recurrence mod p, one prime at a time; not code the
+                           repo ever ran, just a Sage-free floor to compare to
+    fast_compute_bn_modp   the same zero lists from bn_modp.py (Newton)
+    zeros_mod_primes       the same zero lists with the NumPy block engine
+    pairwise_gcd           the gcd(M_i, M_j) loop over every pair of the original
+                           b_n_2000.py stage, without factoring each gcd
+    batch_gcd              batch_gcd over the same M_n
+    dirichlet_s2/_s3       the direct recurrences of dirichlet_decomp.py
+    original_gaussian      the original trial loop of find_gaussian_factorization
+                           (math.isqrt in place of Sage's sqrt)
+    find_gaussian_factorization
+                           p = a^2 + b^2 for every split prime below a bound
+
+b_n_0_mod_p.py and dirichlet_decomp.py are Sage cells that cannot be imported
+from plain Python. The first is run through Sage's preparser when Sage is
+installed (the case is skipped otherwise); the recurrences of the second are
+copied here verbatim, with Fraction for Sage's rationals.
+"""
+
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+from fractions import Fraction
+from functools import lru_cache
+
+from sympy import primerange
+
+BASELINE_PATH = 'benchmark_baseline.json'
+TOLERANCE = 0.25     # report a case as regressed when it is 25% slower
+
+CASES = {}
+BASELINES = {}       # case -> the cases it is compared with
+
+
+def benchmark(baselines=(), **grid):
+    """
+    Register a case; `grid` maps each parameter to the values to time and
+    `baselines` names the cases it is compared with at equal parameters.
+    A case whose setup returns None is skipped (a missing dependency).
+    """
+    def register(fn):
+        points = [{}]
+        for name, values in grid.items():
+            points = [dict(point, **{name: v}) for point in points for v in values]
+        CASES[fn.__name__] = (fn, points)
+        if baselines:
+            BASELINES[fn.__name__] = tuple(baselines)
+        return fn
+    return register
+
+
+def case_key(name, params):
+    """'name[N=500,prime_bound=10000]', the key of one grid point."""
+    return f"{name}[{','.join(f'{k}={v}' for k, v in params.items())}]"
+
+
+# ============================================================================
+# SHARED INPUTS
+# ============================================================================
+
+@lru_cache(maxsize=None)
+def ladder_M(N):
+    """(n, M_n) for 2 <= n <= N with M_n = |numerator(b_n)| / 2, as in b_n_2000.py."""
+    from bn_engine import numerators
+    return tuple((n, abs(num) // 2) for n, num in enumerate(numerators(2, Fraction(1, 2), N)) if n >= 2)
+
+
+@lru_cache(maxsize=None)
+def prime_list(lo, hi):
+    return tuple(primerange(lo, hi))
+
+
+def check_bound(p, N):
+    """N_check of find_new_repeating_primes."""
+    return N if p > 2 * N + 1 else min(N, (p - 1) // 2 - 1)
+
+
+# ============================================================================
+# CASES
+# ============================================================================
+
+@benchmark(N=(100, 200, 300))
+def compute_b_n_correct(N):
+    from b_n_2000 import compute_b_n_correct as run
+    return lambda: run(N)
+
+
+def sage_original(path, name):
+    """`name` from a Sage cell file, run through the preparser; None without Sage."""
+    try:
+        from sage.repl.preparse import preparse_file
+    except ImportError:
+        return None
+    with open(path) as f:
+        code = preparse_file(f.read())
+    namespace = {'__name__': 'sage_original'}
+    exec('from sage.all import *', namespace)
+    exec(compile(code, path, 'exec'), namespace)
+    return namespace[name]
+
+
+@benchmark(N=(250, 1000), prime_bound=(2000,))
+def original_bn_modp(N, prime_bound):
+    run = sage_original('b_n_0_mod_p.py', 'fast_compute_bn_modp')
+    if run is None:
+        return None
+    primes = [p for p in prime_list(5, prime_bound) if check_bound(p, N) >= 1]
+    return lambda: [run(p, check_bound(p, N)) for p in primes]
+
+
+def naive_bn_modp(p, N_max):
+    """
+    Zeros of b_n mod p for s=2, alpha=1/2 from the recurrence
+    b_n = -sum_k b_{n-k} / (2k+1)^2 run directly mod p, O(N^2).
+    """
+    inv = [0] + [pow((2 * k + 1) ** 2, -1, p) for k in range(1, N_max + 1)]
+    b = [(-pow(4, -1, p)) % p]
+    for n in range(1, N_max + 1):
+        b.append(-sum(b[n - k] * inv[k] for k in range(1, n + 1)) % p)
+    return [n for n in range(N_max + 1) if b[n] == 0]
+
+
+@benchmark(N=(250, 1000), prime_bound=(2000,))
+def naive_recurrence_bn_modp(N, prime_bound):
+    primes = [p for p in prime_list(5, prime_bound) if check_bound(p, N) >= 1]
+    return lambda: [naive_bn_modp(p, check_bound(p, N)) for p in primes]
+
+
+BN_MODP_BASELINES = ('original_bn_modp', 'naive_recurrence_bn_modp')
+
+
+@benchmark(baselines=BN_MODP_BASELINES, N=(250, 1000), prime_bound=(2000, 5000))
+def fast_compute_bn_modp(N, prime_bound):
+    import bn_modp
+    primes = [p for p in prime_list(5, prime_bound) if check_bound(p, N) >= 1]
+
+    def run():
+        bn_modp._prefixes.clear()      # time the engine, not the prefix cache
+        return [bn_modp.fast_compute_bn_modp(p, check_bound(p, N)) for p in primes]
+    return run
+
+
+@benchmark(baselines=BN_MODP_BASELINES, N=(250, 1000), prime_bound=(2000, 5000))
+def zeros_mod_primes(N, prime_bound):
+    from bn_modp import zeros_mod_primes as run
+    primes = [p for p in prime_list(5, prime_bound) if check_bound(p, N) >= 1]
+    bounds = [check_bound(p, N) for p in primes]
+    return lambda: run(2, Fraction(1, 2), primes, bounds)
+
+
+def pairwise_gcds(values):
+    """The original pairwise stage: every gcd(M_i, M_j) with i < j that is not 1."""
+    found = []
+    for i in range(len(values)):
+        for j in range(i + 1, len(values)):
+            g = math.gcd(values[i], values[j])
+            if g > 1:
+                found.append((i, j, g))
+    return found
+
+
+@benchmark(N=(100, 200, 300))
+def pairwise_gcd(N):
+    values = [M for _, M in ladder_M(N)]
+    return lambda: pairwise_gcds(values)
+
+
+@benchmark(baselines=('pairwise_gcd',), N=(100, 200, 300, 600))
+def batch_gcd(N):
+    from batch_gcd import batch_gcd as run
+    values = [M for _, M in ladder_M(N)]
+    return lambda: run(values)
+
+
+def dirichlet_recurrence_s2(max_n):
+    b = [Fraction(-1, 4)]
+    for n in range(1, max_n + 1):
+        sum_term = 0
+        for k in range(1, n + 1):
+            sum_term += b[n - k] / (2 * k + 1) ** 2
+        b.append(-sum_term)
+    return b
+
+
+def dirichlet_recurrence_s3(max_n):
+    b = [Fraction(1, 16)]
+    for n in range(1, max_n + 1):
+        sum_term = 0
+        for k in range(1, n + 1):
+            sum_term += b[n - k] / (2 * k + 1) ** 3
+        b.append(Fraction(-1, 2) * sum_term)
+    return b
+
+
+@benchmark(max_n=(100, 200, 300))
+def dirichlet_s2(max_n):
+    return lambda: dirichlet_recurrence_s2(max_n)
+
+
+@benchmark(max_n=(100, 200, 300))
+def dirichlet_s3(max_n):
+    return lambda: dirichlet_recurrence_s3(max_n)
+
+
+def gaussian_trial_loop(p):
+    """The original find_gaussian_factorization: a over 1..sqrt(p)."""
+    if p % 4 != 1:
+        return None, None
+    limit = math.isqrt(p) + 1
+    for a in range(1, limit):
+        b_squared = p - a * a
+        if b_squared < 0:
+            continue
+        b = math.isqrt(b_squared)
+        if b * b == b_squared:
+            return a, b
+    return None, None
+
+
+@benchmark(prime_bound=(10**5,))
+def original_gaussian(prime_bound):
+    primes = [p for p in prime_list(5, prime_bound) if p % 4 == 1]
+    return lambda: [gaussian_trial_loop(p) for p in primes]
+
+
+@benchmark(baselines=('original_gaussian',), prime_bound=(10**5, 10**6))
+def find_gaussian_factorization(prime_bound):
+    try:
+        from geometric_test import find_gaussian_factorization as run
+    except ImportError:
+        # geometric_test needs Sage for its rank test; the function itself is this
+        from two_squares import two_squares as run
+    primes = [p for p in prime_list(5, prime_bound) if p % 4 == 1]
+    return lambda: [run(p) for p in primes]
+
+
+# ============================================================================
+# RUNNING AND COMPARING
+# ============================================================================
+
+def time_call(fn, repeat=3):
+    """Best wall-clock time of `repeat` calls, in seconds."""
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmarks(names=None, repeat=3):
+    """{case key: seconds} for every grid point of the selected cases."""
+    results = {}
+    for name in names or CASES:
+        fn, points = CASES[name]
+        for params in points:
+            key = case_key(name, params)
+            call = fn(**params)
+            if call is None:
+                print(f"  {key:<60} skipped (dependency missing)")
+                continue
+            results[key] = time_call(call, repeat)
+            print(f"  {key:<60} {results[key]:10.4f}s")
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'node': platform.node(),
+        'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    """Write the timings and the machine they were taken on; keeps other keys."""
+    try:
+        baseline = load_baseline(path)
+    except FileNotFoundError:
+        baseline = {'timings': {}}
+    baseline['timings'].update(results)
+    baseline['environment'] = environment()
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=4, sort_keys=True)
+    print(f"Saved {len(results)} timings to {path}")
+
+
+def load_baseline(path=BASELINE_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """
+    Print new / baseline for every case with a baseline and return the
+    regressed keys (slower by more than `tolerance`).
+    """
+    timings = baseline['timings']
+    if baseline.get('environment', {}).get('node') != platform.node():
+        print(f"Note: baseline was recorded on {baseline.get('environment', {}).get('node')!r}, "
+              f"this is {platform.node()!r}")
+    print(f"\n{'case':<60} {'baseline':>10} {'now':>10} {'ratio':>7}")
+    print("-" * 90)
+    regressions = []
+    for key, seconds in results.items():
+        if key not in timings:
+            print(f"{key:<60} {'-':>10} {seconds:10.4f} {'new':>7}")
+            continue
+        ratio = seconds / timings[key] if timings[key] > 0 else math.inf
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        elif ratio < 1 / (1 + tolerance):
+            flag = "  faster"
+        print(f"{key:<60} {timings[key]:10.4f} {seconds:10.4f} {ratio:7.2f}{flag}")
+    print(f"\n{len(regressions)} regression(s) beyond {tolerance:.0%}")
+    return regressions
+
+
+def baseline_report(results):
+    """Speed-up of every case over each of its baseline cases at the same parameters."""
+    rows = []
+    for key, seconds in results.items():
+        name, params = key.split('[', 1)
+        for base in BASELINES.get(name, ()):
+            old = results.get(f"{base}[{params}")
+            if old is not None:
+                rows.append((key, base, old, seconds))
+    if not rows:
+        return
+    print(f"\n{'case':<52} {'against':<26} {'baseline':>10} {'now':>10} {'speed-up':>9}")
+    print("-" * 111)
+    for key, base, old, seconds in rows:
+        print(f"{key:<52} {base:<26} {old:10.4f} {seconds:10.4f} {old / seconds:8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the b_n and zero-search engines.")
+    parser.add_argument('--only', nargs='+', choices=sorted(CASES), help="cases to run")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save', action='store_true', help="record the timings as the baseline")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    print(f"Benchmarks (best of {args.repeat}):")
+    results = run_benchmarks(args.only, args.repeat)
+    baseline_report(results)
+    if args.save:
+        save_baseline(results, args.baseline)
+    else:
+        try:
+            baseline = load_baseline(args.baseline)
+        except FileNotFoundError:
+            sys.exit(f"No baseline at {args.baseline}; run with --save first")
+        sys.exit(1 if compare(results, baseline, args.tolerance) else 0)
@@ -0,0 +1,266 @@
+"""
+Exact coefficient engine for the reciprocal series G(t) = 1/f(t)
+
+    f(t) = -sum_{k>=0} t^k / (k + alpha)^s,    G(t) = sum_{n>=0} b_n t^n
+
+This is the Lerch convention used in k_search.py and heenger.fields.py.
+For s=2, alpha=1/2 it is f(t) = -4*sum t^n/(2n+1)^2, i.e. exactly the
+sequence of compute_b_n_correct in b_n_2000.py and
+compute_recurrence_coefficients in geometric_test.py.
+
+The recurrence b_n = -alpha^s * sum_{k=1}^n b_{n-k} / (k + alpha)^s is run on
+plain Python ints: every b_n is carried as y_n / E_n where E_n is the
+denominator predicted up front from the weights 1/(qk + a)^s (alpha = a/q),
+so no gcd normalisation happens inside the convolution.
+
+coefficients_newton() computes the same list by Newton iteration on
+denominator-cleared integer polynomials, multiplied by Kronecker
+substitution. gmpy2 is used for the big products and gcds when installed.
+"""
+
+import math
+from fractions import Fraction
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+
+def _as_fraction(alpha):
+    """Accept ints, Fractions, strings like '1/2' and Sage rationals."""
+    if isinstance(alpha, Fraction):
+        return alpha
+    if isinstance(alpha, int):
+        return Fraction(alpha)
+    return Fraction(str(alpha))
+
+
+def _primes_upto(n):
+    """Plain Eratosthenes sieve, returns the primes <= n."""
+    if n < 2:
+        return []
+    sieve = bytearray([1]) * (n + 1)
+    sieve[0] = sieve[1] = 0
+    for i in range(2, int(n ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytearray(len(range(i * i, n + 1, i)))
+    return [i for i in range(n + 1) if sieve[i]]
+
+
+def _valuation(m, p):
+    v = 0
+    while m % p == 0:
+        m //= p
+        v += 1
+    return v
+
+
+def _law_exponents(p, s, a, q, N):
+    """
+    e_p(0..N): the largest s * sum v_p(q*k_i + a) over k_1 + ... + k_r <= n,
+    or None if p divides no (qk + a) with k <= N.
+    """
+    k0 = (-a * pow(q, -1, p)) % p or p
+    lightest = {}    # valuation -> smallest k with exactly that valuation
+    for k in range(k0, N + 1, p):
+        lightest.setdefault(_valuation(q * k + a, p), k)
+    if not lightest:
+        return None
+    e = [0] * (N + 1)
+    if len(lightest) == 1:
+        (v, k), = lightest.items()
+        for n in range(k, N + 1):
+            e[n] = s * v * (n // k)
+        return e
+    for n in range(1, N + 1):
+        best = e[n - 1]
+        for v, k in lightest.items():
+            if k <= n and e[n - k] + s * v > best:
+                best = e[n - k] + s * v
+        e[n] = best
+    return e
+
+
+def denominator_steps(s, alpha, N):
+    """
+    Return r_1..r_N (r[0] is unused) with E_n = q^s * r_1 * ... * r_n.
+
+    This is the denominator law: b_n is a sum over compositions
+    n = k_1 + ... + k_r of b_0 * prod -a^s/(q*k_i + a)^s, so
+    E_n = q^s * prod_p p^e_p(n) with e_p from _law_exponents is a common
+    denominator of all of them. e_p(n) >= e_p(n-k) + s*v_p(qk + a), so
+    E_n / E_{n-k} = 0 mod (qk + a)^s for every k <= n, which is all the
+    recurrence needs to stay integral.
+    """
+    alpha = _as_fraction(alpha)
+    a, q = alpha.numerator, alpha.denominator
+    steps = [1] * (N + 1)
+    for p in _primes_upto(q * N + a):
+        if q % p == 0:
+            continue
+        e = _law_exponents(p, s, a, q, N)
+        if e is None:
+            continue
+        for i in range(1, N + 1):
+            if e[i] != e[i - 1]:
+                steps[i] *= p ** (e[i] - e[i - 1])
+    return steps
+
+
+def scaled_numerators(s, alpha, N, samples=32):
+    """
+    Integer-only recurrence. Returns (y, E) with b_n = y[n] / E[n].
+
+    The pair is not reduced; use numerators() or coefficients() for that.
+    For about `samples` evenly spaced n every division by (qk + a)^s is
+    checked to be exact, which is the denominator law doing its job.
+    """
+    alpha = _as_fraction(alpha)
+    a, q = alpha.numerator, alpha.denominator
+    steps = denominator_steps(s, alpha, N)
+    weights = [None] + [(q * k + a) ** s for k in range(1, N + 1)]
+    a_s = a ** s
+    stride = max(1, N // samples) if samples else 0
+
+    y = [-a_s]       # b_0 = 1/c_0 = -(a/q)^s
+    E = [q ** s]
+    for n in range(1, N + 1):
+        check = stride and n % stride == 0
+        ratio = 1    # E_n / E_{n-k}, built up one step at a time
+        acc = 0
+        for k in range(1, n + 1):
+            ratio *= steps[n - k + 1]
+            if check and ratio % weights[k]:
+                raise ArithmeticError(f"denominator law fails at n={n}, k={k}")
+            acc += y[n - k] * (ratio // weights[k])
+        y.append(-a_s * acc)
+        E.append(E[-1] * steps[n])
+    return y, E
+
+
+def numerators(s, alpha, N):
+    """
+    Reduced numerators of b_0..b_N from the integer recurrence: one gcd with
+    the predicted denominator per n, no rational arithmetic in the loop.
+    """
+    y, E = scaled_numerators(s, alpha, N)
+    if gmpy2 is not None:
+        return [int(gmpy2.mpz(y[n]) // gmpy2.gcd(y[n], E[n])) for n in range(N + 1)]
+    return [y[n] // math.gcd(y[n], E[n]) for n in range(N + 1)]
+
+
+def coefficients(s, alpha, N):
+    """
+    Compute b_0..b_N of G(t) = 1/f(t) as a list of Fractions.
+
+    Args:
+        s: weight (2 for the base ladder, 3 for the s=3 searches)
+        alpha: shift, e.g. Fraction(1, 2) or '1/5'
+        N: last index computed
+    """
+    y, E = scaled_numerators(s, alpha, N)
+    return [Fraction(y[n], E[n]) for n in range(N + 1)]
+
+
+# ============================================================================
+# NEWTON INVERSION OVER Q
+# ============================================================================
+
+def _pack(coeffs, nbytes):
+    """Kronecker substitution: sum c_i * 2^(8*nbytes*i) for signed c_i."""
+    buf = bytearray()
+    borrow = bytearray(nbytes * (len(coeffs) + 1))
+    for i, c in enumerate(coeffs):
+        buf += c.to_bytes(nbytes, 'little', signed=True)
+        if c < 0:
+            borrow[(i + 1) * nbytes] = 1
+    return int.from_bytes(buf, 'little') - int.from_bytes(borrow, 'little')
+
+
+def _unpack(z, nbytes, count):
+    """Inverse of _pack for the lowest `count` slots of z."""
+    half = 1 << (8 * nbytes - 1)
+    bias = int.from_bytes(half.to_bytes(nbytes, 'little') * count, 'little')
+    mask = (1 << (8 * nbytes * count)) - 1
+    raw = ((z + bias) & mask).to_bytes(nbytes * count, 'little')
+    return [int.from_bytes(raw[i * nbytes:(i + 1) * nbytes], 'little') - half
+            for i in range(count)]
+
+
+def poly_mul(u, v, count):
+    """First `count` coefficients of u*v for integer coefficient lists."""
+    u, v = u[:count], v[:count]
+    bits = (max(abs(c).bit_length() for c in u)
+            + max(abs(c).bit_length() for c in v)
+            + min(len(u), len(v)).bit_length() + 1)
+    nbytes = bits // 8 + 1
+    x, y = _pack(u, nbytes), _pack(v, nbytes)
+    if gmpy2 is not None:
+        z = int(gmpy2.mpz(x) * gmpy2.mpz(y))
+    else:
+        z = x * y
+    return _unpack(z, nbytes, min(count, len(u) + len(v) - 1))
+
+
+# Fraction(num, den) always runs math.gcd, which is quadratic in the size of
+# b_n; where Fraction keeps its parts in these slots they are set directly.
+_FRACTION_SLOTS = {'_numerator', '_denominator'} <= set(getattr(Fraction, '__slots__', ()))
+
+
+def _fraction(num, den, reduced=False):
+    """
+    Fraction(num, den) for den > 0, with the gcd done by gmpy2 if present;
+    reduced=True trusts that num/den is already in lowest terms.
+    """
+    if not reduced:
+        if gmpy2 is None:
+            return Fraction(num, den)
+        num, den = gmpy2.mpz(num), gmpy2.mpz(den)
+        g = gmpy2.gcd(num, den)
+        num, den = num // g, den // g
+    if not _FRACTION_SLOTS:
+        return Fraction(int(num), int(den))
+    f = Fraction.__new__(Fraction)
+    f._numerator, f._denominator = int(num), int(den)
+    return f
+
+
+def coefficients_newton(s, alpha, N, prefix=None):
+    """
+    Compute b_0..b_N by Newton iteration A <- A + A*(1 - f*A).
+
+    At precision m the iterate is U/d with U an integer list and f mod t^2m
+    is V/e with e = lcm (qk + a)^s, so each step is two integer polynomial
+    products and the precision doubles. Returns the same Fractions as
+    coefficients().
+
+    A known prefix b_0..b_M (Fractions, e.g. from coefficient_store) starts
+    the iteration at precision M+1 instead of 1, so extending to N only costs
+    the steps from M+1 up to N+1.
+    """
+    alpha = _as_fraction(alpha)
+    a, q = alpha.numerator, alpha.denominator
+    q_s = q ** s
+
+    if prefix:
+        prefix = list(prefix[:N + 1])
+        d = math.lcm(*[b.denominator for b in prefix])
+        U = [b.numerator * (d // b.denominator) for b in prefix]
+    else:
+        prefix = []
+        U = [-a ** s]    # A = 1/c_0
+        d = q_s
+    m = len(U)
+    while m < N + 1:
+        m2 = min(2 * m, N + 1)
+        e = math.lcm(*[q * k + a for k in range(m2)]) ** s
+        V = [-q_s * (e // (q * k + a) ** s) for k in range(m2)]
+        # f*A = T/(e*d) equals 1 below t^m, so only T[m:m2] is a correction
+        T = poly_mul(V, U, m2)
+        H = poly_mul(U, [-c for c in T[m:m2]], m2 - m)
+        ed = e * d
+        U = [u * ed for u in U] + H
+        d = ed * d
+        m = m2
+    return prefix + [_fraction(u, d) for u in U[len(prefix):]]
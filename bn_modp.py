@@ -0,0 +1,385 @@
+"""
+Sage-free b_n mod p engine and multi-modular reconstruction of exact b_n
+
+bn_mod_p() reduces the Lerch reciprocal G(t) = 1/f(t) of bn_engine.py modulo
+a prime with the same Newton loop as fast_compute_bn_modp in b_n_0_mod_p.py,
+without Sage: products use a NumPy number-theoretic transform when p - 1 has
+enough factors of 2, and Kronecker substitution on plain ints otherwise.
+
+coefficients_multimodular() computes b_n * E_n modulo many word-size primes
+in a process pool, where E_n is the a-priori denominator of bn_engine, and
+rebuilds the exact numerators by Chinese remaindering.
+
+bn_mod_primes() runs the recurrence for a whole block of primes at once on
+an int64 NumPy array, one column per prime.
+
+Every engine accepts a known prefix b_0..b_M and only computes b_{M+1}..b_N;
+bn_mod_p_cached() keeps recent prefixes per (s, alpha, p) in memory.
+"""
+
+import math
+import os
+from collections import OrderedDict
+from fractions import Fraction
+from functools import lru_cache
+from multiprocessing import Pool
+
+import numpy as np
+from sympy import prevprime, primitive_root
+
+from bn_engine import _as_fraction, _fraction, denominator_steps, poly_mul
+
+
+# ============================================================================
+# NUMBER-THEORETIC TRANSFORM
+# ============================================================================
+
+def ntt_friendly(p, length):
+    """True if Z/p has a root of unity of order `length` (a power of 2)."""
+    return p < 2**31 and (p - 1) % length == 0
+
+
+@lru_cache(maxsize=None)
+def _ntt_tables(p, length):
+    """Bit-reversal permutation and per-stage twiddles for an NTT mod p."""
+    bits = length.bit_length() - 1
+    rev = np.zeros(length, dtype=np.int64)
+    for b in range(bits):
+        rev |= ((np.arange(length) >> b) & 1) << (bits - 1 - b)
+    g = primitive_root(p)
+    twiddles = []
+    half = 1
+    while half < length:
+        w = pow(g, (p - 1) // (2 * half), p)
+        tw = np.ones(half, dtype=np.int64)
+        for j in range(1, half):
+            tw[j] = tw[j - 1] * w % p
+        twiddles.append(tw)
+        half *= 2
+    return rev, twiddles
+
+
+def _ntt(a, p):
+    """Iterative radix-2 NTT of an int64 array whose length is a power of 2."""
+    rev, twiddles = _ntt_tables(p, a.size)
+    a = a[rev]
+    half = 1
+    for tw in twiddles:
+        blocks = a.reshape(-1, 2 * half)
+        u = blocks[:, :half]
+        v = blocks[:, half:] * tw % p
+        a = np.concatenate(((u + v) % p, (u - v) % p), axis=1).reshape(-1)
+        half *= 2
+    return a
+
+
+def ntt_mul(u, v, p, count):
+    """First `count` coefficients of u*v mod p, for an NTT-friendly p."""
+    u, v = u[:count], v[:count]
+    length = 1
+    while length < len(u) + len(v) - 1:
+        length *= 2
+    fu = np.zeros(length, dtype=np.int64)
+    fv = np.zeros(length, dtype=np.int64)
+    fu[:len(u)] = u
+    fv[:len(v)] = v
+    prod = _ntt(_ntt(fu, p) * _ntt(fv, p) % p, p)
+    # inverse transform: forward again, reverse indices 1..L-1, divide by L
+    prod = np.concatenate((prod[:1], prod[:0:-1])) * pow(length, -1, p) % p
+    return prod[:min(count, len(u) + len(v) - 1)].tolist()
+
+
+def mul_mod_p(u, v, p, count):
+    """First `count` coefficients of u*v mod p, NTT when p allows it."""
+    length = 1
+    while length < min(count, len(u)) + min(count, len(v)) - 1:
+        length *= 2
+    if ntt_friendly(p, length):
+        return ntt_mul(u, v, p, count)
+    return [c % p for c in poly_mul(u, v, count)]
+
+
+# ============================================================================
+# SERIES MOD p
+# ============================================================================
+
+def lerch_coeffs_mod_p(s, alpha, p, N):
+    """c_k = -1/(k + alpha)^s mod p for k = 0..N."""
+    alpha = _as_fraction(alpha)
+    a, q = alpha.numerator, alpha.denominator
+    q_s = pow(q, s, p)
+    c = []
+    for k in range(N + 1):
+        w = (q * k + a) % p
+        if w == 0 or q_s == 0:
+            raise ValueError(f"p={p} divides a denominator of f(t) below t^{N + 1}")
+        c.append(-q_s * pow(w, -s, p) % p)
+    return c
+
+
+def inverse_mod_p(c, p, N, prefix=None):
+    """
+    First N+1 coefficients of 1/C(t) mod p, C given by its coefficient list.
+    Newton iteration A <- A + A*(1 - C*A), doubling the precision each step,
+    starting from `prefix` (the first coefficients of 1/C) when given.
+    """
+    A = list(prefix[:N + 1]) if prefix else [pow(c[0], -1, p)]
+    m = len(A)
+    while m < N + 1:
+        m2 = min(2 * m, N + 1)
+        T = mul_mod_p(c, A, p, m2)
+        A += mul_mod_p(A, [-t % p for t in T[m:m2]], p, m2 - m)
+        m = m2
+    return A
+
+
+def bn_mod_p(s, alpha, p, N, prefix=None):
+    """
+    b_0..b_N mod p. p must not divide q or any (qk + a) with k <= N.
+    A known prefix b_0..b_M mod p is extended rather than recomputed.
+    """
+    return inverse_mod_p(lerch_coeffs_mod_p(s, alpha, p, N), p, N, prefix)
+
+
+_prefixes = OrderedDict()
+PREFIX_CACHE_SIZE = 256
+
+
+def bn_mod_p_cached(s, alpha, p, N):
+    """
+    bn_mod_p through an in-memory cache keyed by (s, alpha, p): a longer
+    request extends the cached prefix, a shorter one is a slice of it. Only
+    the PREFIX_CACHE_SIZE most recently used moduli are kept.
+    """
+    key = (s, _as_fraction(alpha), p)
+    cached = _prefixes.pop(key, None)
+    if cached is None or len(cached) <= N:
+        cached = bn_mod_p(s, alpha, p, N, cached)
+    _prefixes[key] = cached
+    while len(_prefixes) > PREFIX_CACHE_SIZE:
+        _prefixes.popitem(last=False)
+    return cached[:N + 1]
+
+
+def fast_compute_bn_modp(p, N_max):
+    """
+    Sage-free drop-in for fast_compute_bn_modp in b_n_0_mod_p.py: the indices
+    n <= N_max with b_n = 0 mod p for s=2, alpha=1/2.
+    """
+    return [n for n, b in enumerate(bn_mod_p_cached(2, Fraction(1, 2), p, N_max)) if b == 0]
+
+
+# ============================================================================
+# BLOCKS OF PRIMES (NumPy)
+# ============================================================================
+
+def powmod(base, exponent, moduli):
+    """Elementwise base^exponent mod moduli for int64 arrays, moduli < 2^31."""
+    result = np.ones_like(base)
+    base = base % moduli
+    exponent = exponent.copy()
+    while exponent.any():
+        odd = (exponent & 1).astype(bool)
+        result = np.where(odd, result * base % moduli, result)
+        base = base * base % moduli
+        exponent >>= 1
+    return result
+
+
+def _check_primes(a, q, P, bounds):
+    """ValueError unless each p in P is prime to q and to every qk + a, k <= its bound."""
+    bounds = np.broadcast_to(np.asarray(bounds, dtype=np.int64), P.shape)
+    q_inv = powmod(np.full_like(P, q), P - 2, P)
+    first = np.where(q % P == 0, 0, (-(a % P)) % P * q_inv % P)   # least k with p | qk + a
+    bad = np.flatnonzero(first <= bounds)
+    if bad.size:
+        p, N = int(P[bad[0]]), int(bounds[bad[0]])
+        raise ValueError(f"p={p} divides a denominator of f(t) below t^{N + 1}")
+
+
+def bn_mod_primes(s, alpha, primes, N, prefix=None, power=1):
+    """
+    b_0..b_N mod p for every p in `primes`, as an (N+1, len(primes)) array.
+
+    Row n is advanced for all primes with one vectorised convolution. Like
+    bn_mod_p, raises ValueError if some p divides q or a (qk + a) with k <= N.
+    Rows of a previous result passed as `prefix` are reused and only the rows
+    after them are computed. With power=K the residues are taken mod p^K
+    instead (p^K below 2^31).
+    """
+    alpha = _as_fraction(alpha)
+    a, q = alpha.numerator, alpha.denominator
+    P = np.asarray(primes, dtype=np.int64)
+    if P.size and (P.astype(float) ** power).max() >= 2**31:
+        raise ValueError("bn_mod_primes needs p^power below 2^31")
+    _check_primes(a, q, P, N)
+    return _bn_block(s, a, q, P, N, prefix, power)
+
+
+def _bn_block(s, a, q, P, N, prefix=None, power=1):
+    """
+    bn_mod_primes without the check: a prime dividing some (qk + a) gets
+    weight 0 at that k, so its column is only meaningful below that k.
+    """
+    M = P ** power
+    inv_exp = s * (P ** (power - 1) * (P - 1) - 1)     # u^-s = u^(s*(phi-1))
+
+    k = np.arange(N + 1, dtype=np.int64)[:, None]
+    base = (q * k + a) % M
+    W = powmod(base, np.broadcast_to(inv_exp, base.shape), M)
+    W[base % P == 0] = 0                  # 1/(qk+a)^s mod p^K, 0 where undefined
+    scale = pow(a, s) % M                 # b_n = -a^s * sum_k b_{n-k} W_k
+
+    B = np.zeros((N + 1, P.size), dtype=np.int64)
+    if prefix is not None:
+        start = min(len(prefix), N + 1)
+        B[:start] = prefix[:start]
+    else:
+        start = 1
+        B[0] = (-scale * powmod(np.full_like(P, q), inv_exp, M)) % M
+    # products are < p^2K, so this many of them can be summed in int64
+    safe = (2**63 - 1) // max(1, int(M.max(initial=2)) - 1) ** 2
+    for n in range(start, N + 1):
+        terms = W[n:0:-1] * B[:n]
+        if n > safe:
+            terms %= M
+        B[n] = (-scale * (terms.sum(axis=0) % M)) % M
+    return B
+
+
+def zeros_mod_primes(s, alpha, primes, N, block_size=1024):
+    """
+    Per-prime zero lists {n <= N_p : b_n = 0 mod p}, in the order of `primes`.
+
+    N is either one bound for every prime or a sequence of per-prime bounds
+    (like N_check in find_new_repeating_primes). For s=2, alpha=1/2 this is
+    the list fast_compute_bn_modp(p, N_p) returns, and a prime it would
+    reject raises the same ValueError.
+    """
+    alpha = _as_fraction(alpha)
+    a, q = alpha.numerator, alpha.denominator
+    primes = np.asarray(list(primes), dtype=np.int64)
+    bounds = [N] * len(primes) if isinstance(N, int) else list(N)
+    if primes.size and primes.max() >= 2**31:
+        raise ValueError("zeros_mod_primes needs primes below 2^31")
+    _check_primes(a, q, primes, bounds)       # each prime against its own bound
+    result = []
+    for start in range(0, len(primes), block_size):
+        block = primes[start:start + block_size]
+        limits = bounds[start:start + block_size]
+        B = _bn_block(s, a, q, block, max(limits, default=0))
+        for j, limit in enumerate(limits):
+            result.append(np.flatnonzero(B[:limit + 1, j] == 0).tolist())
+    return result
+
+
+# ============================================================================
+# MULTI-MODULAR RECONSTRUCTION
+# ============================================================================
+
+def word_primes(count, start=2**61):
+    """The `count` largest primes below `start`."""
+    result = []
+    p = start
+    for _ in range(count):
+        p = prevprime(p)
+        result.append(p)
+    return result
+
+
+def numerator_bits(s, alpha, E):
+    """
+    Bit bound for |b_n * E_n|.
+
+    With theta = max(1, sum_{k=1}^N (a/(qk + a))^s) the recurrence gives
+    |b_n| <= |b_0| * theta^n by induction.
+    """
+    alpha = _as_fraction(alpha)
+    a, q = alpha.numerator, alpha.denominator
+    N = len(E) - 1
+    theta = math.fsum((a / (q * k + a)) ** s for k in range(1, N + 1))
+    log_theta = math.log2(max(1.0, theta)) * (1 + 1e-9)
+    b0_bits = math.ceil(s * math.log2(a / q)) + 1
+    return [max(0, b0_bits + math.ceil(n * log_theta)) + E[n].bit_length() + 2
+            for n in range(N + 1)]
+
+
+def _product_tree(moduli):
+    """
+    Levels of a binary product tree over len(moduli) == 2^h leaves, paired
+    with the inverse of each left child modulo its right sibling.
+    """
+    level = list(moduli)
+    tree = []
+    while len(level) > 1:
+        inverses = [pow(level[i], -1, level[i + 1]) for i in range(0, len(level), 2)]
+        tree.append((level, inverses))
+        level = [level[i] * level[i + 1] for i in range(0, len(level), 2)]
+    tree.append((level, []))
+    return tree
+
+
+def _crt(residues, tree):
+    """
+    Combine residues modulo the leftmost len(residues) == 2^h leaves of
+    `tree`. Returns (r, M) with 0 <= r < M.
+    """
+    height = (len(residues) - 1).bit_length()
+    values = list(residues)
+    for h in range(height):
+        moduli, inverses = tree[h]
+        values = [values[i] + moduli[i] * ((values[i + 1] - values[i]) * inverses[i // 2]
+                                           % moduli[i + 1])
+                  for i in range(0, len(values), 2)]
+    return values[0], tree[height][0][0]
+
+
+_job = {}
+
+
+def _init_worker(s, alpha, N, steps, moduli):
+    _job.update(s=s, alpha=alpha, N=N, steps=steps, moduli=moduli)
+
+
+def _scaled_residues(p):
+    """b_n * E_n mod p for n = 0..N."""
+    s, alpha, N, steps = _job['s'], _job['alpha'], _job['N'], _job['steps']
+    b = bn_mod_p(s, alpha, p, N)
+    E = pow(alpha.denominator, s, p)
+    out = [b[0] * E % p]
+    for n in range(1, N + 1):
+        E = E * steps[n] % p
+        out.append(b[n] * E % p)
+    return out
+
+
+def _reconstruct(residues):
+    if 'tree' not in _job:
+        _job['tree'] = _product_tree(_job['moduli'])
+    r, M = _crt(residues, _job['tree'])
+    return r - M if 2 * r > M else r
+
+
+def coefficients_multimodular(s, alpha, N, workers=None):
+    """
+    Compute b_0..b_N by Chinese remaindering, one word-size prime per task.
+
+    Returns the same Fractions as bn_engine.coefficients(). workers defaults
+    to os.cpu_count().
+    """
+    alpha = _as_fraction(alpha)
+    steps = denominator_steps(s, alpha, N)
+    E = [alpha.denominator ** s]
+    for n in range(1, N + 1):
+        E.append(E[-1] * steps[n])
+    bits = numerator_bits(s, alpha, E)
+    # every word prime is > 2^60; round up to a whole subtree of primes
+    counts = [1 << (-(-b // 60) - 1).bit_length() for b in bits]
+    moduli = word_primes(max(counts))
+
+    with Pool(workers or os.cpu_count(), _init_worker,
+              (s, alpha, N, steps, moduli)) as pool:
+        table = pool.map(_scaled_residues, moduli, chunksize=4)
+        columns = [[table[i][n] for i in range(counts[n])] for n in range(N + 1)]
+        y = pool.map(_reconstruct, columns, chunksize=8)
+    return [_fraction(y[n], E[n]) for n in range(N + 1)]
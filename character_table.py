@@ -0,0 +1,45 @@
+"""
+Dirichlet character lookup tables cached on disk
+
+character_table(modulus, index) is chi = DirichletGroup(modulus)[index]
+evaluated once on every residue 0..modulus-1 and stored as a complex128
+NumPy array in character_tables/chi_<modulus>_<index>.npy. Sage is only
+needed the first time; after that the table is a plain np.load, and
+chi(p) for a whole prime array is table[primes % modulus].
+"""
+
+import os
+
+import numpy as np
+
+try:
+    from sage.all import DirichletGroup
+except ImportError:
+    DirichletGroup = None
+
+CACHE_DIR = 'character_tables'
+
+
+def character_table(modulus, index, directory=CACHE_DIR):
+    """chi(r) for r = 0..modulus-1 as a complex array, built with Sage on first use."""
+    path = os.path.join(directory, f"chi_{modulus}_{index}.npy")
+    if os.path.exists(path):
+        return np.load(path)
+    if DirichletGroup is None:
+        raise ImportError(f"{path} is not cached yet and building it needs Sage")
+    chi = DirichletGroup(modulus)[index]
+    table = np.array([complex(chi(r)) for r in range(modulus)], dtype=np.complex128)
+    os.makedirs(directory, exist_ok=True)
+    np.save(path, table)
+    return table
+
+
+def character_values(table, primes):
+    """chi(p) for every p in an integer array."""
+    return table[np.asarray(primes, dtype=np.int64) % len(table)]
+
+
+def character_support(table, primes):
+    """The p in `primes` with chi(p) != 0, as an array."""
+    P = np.asarray(primes, dtype=np.int64)
+    return P[table[P % len(table)] != 0]
@@ -0,0 +1,123 @@
+"""
+On-disk store of exact b_n, keyed by (s, alpha)
+
+Each (s, alpha) gets two files in the store directory:
+
+    bn_s<s>_a<a>_<q>.idx   b'BNSTORE1', s, a, q (int64 LE), then one row
+                           (offset, numerator bytes, denominator bytes) per n
+    bn_s<s>_a<a>_<q>.dat   numerators (signed) and denominators (unsigned)
+                           as little-endian two's-complement bytes, back to back
+
+Both files are append-only (data first, index rows last) and read through
+np.memmap, so b_n for one n is a single slice of the data file and opening a
+store with 10^4 entries costs no more than opening one with 10.
+load_coefficients() reads what is stored and extends it with
+coefficients_newton(prefix=...), appending only the new tail.
+"""
+
+import os
+
+import numpy as np
+
+from bn_engine import _as_fraction, _fraction, coefficients_newton
+
+MAGIC = b'BNSTORE1'
+HEADER = 32
+
+
+def store_stem(directory, s, alpha):
+    alpha = _as_fraction(alpha)
+    return os.path.join(directory, f"bn_s{s}_a{alpha.numerator}_{alpha.denominator}")
+
+
+class CoefficientStore:
+    """Append-only, memory-mapped store of b_0, b_1, ... for one (s, alpha)."""
+
+    def __init__(self, directory, s, alpha):
+        self.s, self.alpha = s, _as_fraction(alpha)
+        os.makedirs(directory, exist_ok=True)
+        stem = store_stem(directory, s, self.alpha)
+        self.idx_path, self.dat_path = stem + '.idx', stem + '.dat'
+        key = (s, self.alpha.numerator, self.alpha.denominator)
+        if not os.path.exists(self.idx_path):
+            with open(self.idx_path, 'wb') as f:
+                f.write(MAGIC)
+                f.write(np.array(key, dtype='<i8').tobytes())
+            open(self.dat_path, 'wb').close()
+        with open(self.idx_path, 'rb') as f:
+            if f.read(8) != MAGIC:
+                raise ValueError(f"{self.idx_path} is not a coefficient store")
+            if tuple(np.frombuffer(f.read(24), dtype='<i8').tolist()) != key:
+                raise ValueError(f"{self.idx_path} holds a different (s, alpha)")
+        self._map()
+
+    def _map(self):
+        count = (os.path.getsize(self.idx_path) - HEADER) // 24
+        size = os.path.getsize(self.dat_path)
+        self.index = (np.memmap(self.idx_path, dtype='<u8', mode='r', offset=HEADER,
+                                shape=(count, 3))
+                      if count else np.zeros((0, 3), dtype='<u8'))
+        self.data = (np.memmap(self.dat_path, dtype=np.uint8, mode='r')
+                     if size else np.zeros(0, dtype=np.uint8))
+
+    def __len__(self):
+        return len(self.index)
+
+    def _parts(self, n):
+        offset, num_len, den_len = self.index[n].tolist()
+        raw = self.data[offset:offset + num_len + den_len].tobytes()
+        return (int.from_bytes(raw[:num_len], 'little', signed=True),
+                int.from_bytes(raw[num_len:], 'little'))
+
+    def numerator(self, n):
+        return self._parts(n)[0]
+
+    def denominator(self, n):
+        return self._parts(n)[1]
+
+    def __getitem__(self, n):
+        if isinstance(n, slice):
+            return [self[i] for i in range(*n.indices(len(self)))]
+        if n < 0:
+            n += len(self)
+        if not 0 <= n < len(self):
+            raise IndexError(f"b_{n} is not in the store (have {len(self)})")
+        return _fraction(*self._parts(n), reduced=True)
+
+    def extend(self, values):
+        """Append b_len, b_len+1, ... given as Fractions."""
+        # drop a row torn by a crash mid-append, so new rows stay 24-byte aligned
+        rows_end = HEADER + 24 * len(self)
+        if os.path.getsize(self.idx_path) != rows_end:
+            self.index = None      # unmap before truncating (Windows refuses otherwise)
+            os.truncate(self.idx_path, rows_end)
+        offset = os.path.getsize(self.dat_path)
+        rows = []
+        with open(self.dat_path, 'ab') as f:
+            for b in values:
+                num = b.numerator.to_bytes(b.numerator.bit_length() // 8 + 1, 'little', signed=True)
+                den = b.denominator.to_bytes((b.denominator.bit_length() + 7) // 8, 'little')
+                f.write(num)
+                f.write(den)
+                rows.append((offset, len(num), len(den)))
+                offset += len(num) + len(den)
+            f.flush()
+            os.fsync(f.fileno())
+        # index rows last, once their bytes are on disk: a crash before this
+        # leaves only unreferenced data, which the next append skips past
+        with open(self.idx_path, 'ab') as f:
+            f.write(np.array(rows, dtype='<u8').reshape(-1, 3).tobytes())
+        self._map()
+
+
+def load_coefficients(s, alpha, N, directory='bn_store'):
+    """
+    b_0..b_N as Fractions, read from the store under `directory`. Anything
+    missing is computed from the stored prefix and appended first.
+    """
+    store = CoefficientStore(directory, s, alpha)
+    have = len(store)
+    if have <= N:
+        print(f"Computing b_{have}..b_{N} for s={s}, alpha={store.alpha}...")
+        store.extend(coefficients_newton(s, store.alpha, N, prefix=store[:])[have:])
+    return store[:N + 1]
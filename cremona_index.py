@@ -0,0 +1,108 @@
+"""
+Offline index of the Cremona elliptic curve tables, keyed by conductor
+
+export_cremona_index() walks the Cremona database once and writes, for every
+conductor up to a bound that has curves, the optimal curves (one per isogeny
+class, what CremonaDatabase().curves(N) lists) as [label, rank, cm] to a
+JSON file (cremona_index.json), together with the bound it covers. The CM flag
+comes from the j-invariant of the stored a-invariants, so no EllipticCurve is
+built and no rank is recomputed. After that, curves_for_conductors() answers
+thousands of conductors with dictionary lookups and needs neither Sage nor
+the database; a conductor past the recorded bound extends the export first.
+"""
+
+import json
+import os
+from fractions import Fraction
+
+INDEX_PATH = 'cremona_index.json'
+
+# The 13 j-invariants of elliptic curves over Q with complex multiplication
+CM_J_INVARIANTS = frozenset([
+    0, 1728, -3375, 8000, -32768, 54000, 287496, -884736, -12288000,
+    16581375, -884736000, -147197952000, -262537412640768000,
+])
+
+_loaded = {}
+
+
+def j_invariant(ainvs):
+    """j(E) for the a-invariants [a1, a2, a3, a4, a6], as a Fraction."""
+    a1, a2, a3, a4, a6 = (int(a) for a in ainvs)
+    b2 = a1 * a1 + 4 * a2
+    b4 = a1 * a3 + 2 * a4
+    b6 = a3 * a3 + 4 * a6
+    b8 = a1 * a1 * a6 + 4 * a2 * a6 - a1 * a3 * a4 + a2 * a3 * a3 - a4 * a4
+    c4 = b2 * b2 - 24 * b4
+    disc = -b2 * b2 * b8 - 8 * b4 ** 3 - 27 * b6 * b6 + 9 * b2 * b4 * b6
+    return Fraction(c4 ** 3, disc)
+
+
+def has_cm(ainvs):
+    return j_invariant(ainvs) in CM_J_INVARIANTS
+
+
+def export_cremona_index(max_conductor=None, path=INDEX_PATH):
+    """
+    Write the index for all conductors <= max_conductor (default: the whole
+    installed database). An existing index is extended from its recorded
+    bound rather than rebuilt. Needs Sage.
+    """
+    from sage.databases.cremona import CremonaDatabase
+    cdb = CremonaDatabase()
+    largest = int(cdb.largest_conductor())
+    max_conductor = largest if max_conductor is None else min(int(max_conductor), largest)
+
+    bound, curves = 0, {}
+    if os.path.exists(path):
+        with open(path) as f:
+            data = json.load(f)
+        bound, curves = data['max_conductor'], data['curves']
+    for N in range(bound + 1, max_conductor + 1):
+        found = cdb.curves(N)
+        if not found:
+            continue
+        curves[str(N)] = [[f"{N}{suffix}", int(rank), has_cm(ainvs)]
+                          for suffix, (ainvs, rank, _torsion) in sorted(found.items())]
+        if N % 10000 == 0:
+            print(f"  Cremona export: conductor {N}/{max_conductor}")
+
+    max_conductor = max(bound, max_conductor)
+    with open(path, 'w') as f:
+        json.dump({'max_conductor': max_conductor, 'database_largest': largest, 'curves': curves},
+                  f, separators=(',', ':'))
+    print(f"Wrote {sum(len(c) for c in curves.values())} optimal curves over "
+          f"{len(curves)} conductors <= {max_conductor} to {path}")
+    _loaded.pop(path, None)
+
+
+def load_cremona_index(path=INDEX_PATH):
+    """
+    (max_conductor, {conductor: [(label, rank, cm), ...]}, database_largest),
+    read once per process.
+    """
+    if path not in _loaded:
+        with open(path) as f:
+            data = json.load(f)
+        curves = {int(N): [tuple(c) for c in cs] for N, cs in data['curves'].items()}
+        _loaded[path] = (data['max_conductor'], curves, data['database_largest'])
+    return _loaded[path]
+
+
+def curves_for_conductors(conductors, path=INDEX_PATH, max_conductor=None):
+    """
+    {N: [(label, rank, cm), ...]} of optimal curves for every N in
+    `conductors`; [] means no curves of conductor N, None means N lies beyond
+    the Cremona database itself. If the index is missing or stops short of
+    the largest N asked for, it is exported (or extended) first, up to
+    max_conductor (default: that largest N).
+    """
+    conductors = [int(N) for N in conductors]
+    wanted = max(max_conductor or 0, max(conductors, default=1))
+    if not os.path.exists(path):
+        export_cremona_index(wanted, path)
+    bound, _, largest = load_cremona_index(path)
+    if bound < wanted and bound < largest:
+        export_cremona_index(wanted, path)
+    bound, curves, _ = load_cremona_index(path)
+    return {N: (curves.get(N, []) if N <= bound else None) for N in conductors}
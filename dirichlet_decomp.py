@@ -1,4 +1,6 @@
 from sage.all import *
+from fractions import Fraction
+from valuation_table import valuation_table
 
 def find_zeros_s3_direct(max_n=100, prime_bound=200):
     """
@@ -66,21 +68,12 @@ def find_zeros_s2_direct(max_n=100, prime_bound=200):
         bn = -sum_term
         b.append(bn)
     
-    zeros_by_prime = {}
-    
-    for p in primes(3, prime_bound):
-        zeros = []
-        for n in range(1, min(max_n+1, len(b))):
-            bn = b[n]
-            num = bn.numerator()
-            den = bn.denominator()
-            
-            if den % p != 0:
-                if num % p == 0:
-                    zeros.append(n)
-        
-        if len(zeros) >= 2:
-            zeros_by_prime[p] = zeros
+    # b_n = 0 mod p  <=>  v_p(b_n) > 0, read off a bulk valuation table
+    # plain ints: preparsed literals are Sage Integers, which Fraction and NumPy reject
+    table = valuation_table(int(2), Fraction(int(1), int(2)), int(3), int(prime_bound),
+                            int(1), int(max_n))
+    zeros_by_prime = {p: zeros for p, zeros in table.zero_lists().items()
+                      if len(zeros) >= 2}
     
     return zeros_by_prime, b
 
@@ -0,0 +1,146 @@
+"""
+Batch ranks of the congruent-number curves E_p: y^2 = x^3 - p^2 x
+
+rank_batch() runs each curve in its own worker process, at most `workers` at
+a time, and terminates any that run past `timeout` seconds. For every curve
+the cheap information comes first:
+
+    1. conductor and root number (the parity of the rank, conjecturally)
+    2. 2-descent bounds lower <= rank <= upper (E.rank_bounds())
+    3. if the bounds leave one value of the right parity, that value
+    4. only then the full E.rank() (mwrank)
+
+and the method that settled the rank is recorded with it. A rank from step 3
+assumes the parity conjecture, so it is stored with conditional = 1 rather
+than as a proven rank. Results, including timeouts, are kept in a SQLite file
+keyed by p; a timed-out curve is retried only when a longer timeout is asked
+for. Every worker reports through a pipe of its own, so terminating one
+cannot damage the channel of any other.
+"""
+
+import os
+import sqlite3
+import time
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import wait
+
+from sage.all import EllipticCurve
+
+
+FAILED = (None, None, None, None, None)
+
+
+def curve_rank(p):
+    """
+    (rank, lower, upper, conductor, root_number, method, conditional) for
+    E_p; conditional is True when the rank rests on the parity conjecture.
+    """
+    E = EllipticCurve([0, 0, 0, -p**2, 0])
+    conductor = int(E.conductor())
+    root_number = int(E.root_number())
+    lower, upper = (int(x) for x in E.rank_bounds())
+    if lower == upper:
+        return lower, lower, upper, conductor, root_number, '2-descent', False
+    parity = 0 if root_number == 1 else 1
+    candidates = [r for r in range(lower, upper + 1) if r % 2 == parity]
+    if len(candidates) == 1:
+        return candidates[0], lower, upper, conductor, root_number, 'parity', True
+    return int(E.rank()), lower, upper, conductor, root_number, 'mwrank', False
+
+
+def _rank_worker(p, conn):
+    start = time.time()
+    try:
+        result = curve_rank(p)
+    except Exception as e:
+        result = FAILED + (f"error: {e}", False)
+    conn.send((result, time.time() - start))
+    conn.close()
+
+
+class RankCache:
+    """SQLite record of p -> rank, bounds, conductor, root number and method."""
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS ranks (
+                p INTEGER PRIMARY KEY, rank INTEGER, lower INTEGER, upper INTEGER,
+                conductor INTEGER, root_number INTEGER, method TEXT, seconds REAL,
+                timeout REAL, conditional INTEGER)""")
+
+    def get(self, p, timeout):
+        """
+        The stored row for p as a dict, or None if it has to be (re)computed:
+        not there, failed, or timed out under a shorter timeout.
+        """
+        row = self.db.execute(
+            "SELECT rank, lower, upper, conductor, root_number, method, seconds, timeout, "
+            "conditional FROM ranks WHERE p = ?", (p,)).fetchone()
+        if row is None or row[5].startswith('error:') or (row[5] == 'timeout' and row[7] < timeout):
+            return None
+        keys = ('rank', 'lower', 'upper', 'conductor', 'root_number', 'method', 'seconds')
+        return dict(zip(keys, row[:7]), p=p, conditional=bool(row[8]))
+
+    def put(self, p, result, seconds, timeout):
+        rank, lower, upper, conductor, root_number, method, conditional = result
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO ranks (p, rank, lower, upper, conductor, root_number, "
+                "method, seconds, timeout, conditional) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (p, rank, lower, upper, conductor, root_number, method, seconds, timeout,
+                 int(conditional)))
+
+    def close(self):
+        self.db.close()
+
+
+def rank_batch(primes, cache='ec_ranks.db', workers=None, timeout=60.0):
+    """
+    Rank data for E_p for every p in `primes`, as a list of dicts in the same
+    order (rank is None for curves that timed out or failed, conditional is
+    True for ranks that assume the parity conjecture).
+
+    Args:
+        cache: SQLite path of earlier results
+        workers: concurrent curves (default os.cpu_count())
+        timeout: hard limit in seconds per curve
+    """
+    store = RankCache(cache)
+    workers = workers or os.cpu_count()
+    pending = [p for p in dict.fromkeys(int(p) for p in primes) if store.get(p, timeout) is None]
+    print(f"Ranks: {len(pending)} curves to compute, the rest from {cache}")
+
+    running = {}     # receiving end of the worker's pipe -> (p, process, start time)
+    while pending or running:
+        while pending and len(running) < workers:
+            p = pending.pop(0)
+            receiver, sender = Pipe(duplex=False)
+            proc = Process(target=_rank_worker, args=(p, sender), daemon=True)
+            proc.start()
+            sender.close()
+            running[receiver] = (p, proc, time.time())
+        for receiver in wait(list(running), timeout=0.1):
+            p, proc, started = running.pop(receiver)
+            try:
+                result, seconds = receiver.recv()
+            except EOFError:
+                result, seconds = FAILED + ("error: worker exited", False), time.time() - started
+            receiver.close()
+            proc.join()
+            store.put(p, result, seconds, timeout)
+            flag = ", conditional on parity" if result[6] else ""
+            print(f"  p = {p}: rank = {result[0]} ({result[5]}{flag}, {seconds:.1f}s)")
+        now = time.time()
+        for receiver, (p, proc, started) in list(running.items()):
+            if now - started > timeout:
+                proc.terminate()
+                proc.join()
+                receiver.close()
+                del running[receiver]
+                store.put(p, FAILED + ('timeout', False), now - started, timeout)
+                print(f"  p = {p}: timed out after {timeout:.0f}s")
+
+    results = [store.get(int(p), timeout) for p in primes]
+    store.close()
+    return results
@@ -0,0 +1,194 @@
+"""
+Disk-memoised factorisation with a per-number time budget
+
+FactorCache.factor(n) tries, in order:
+
+    1. trial division by every prime <= trial_bound, done as one gcd with
+       their product and split down the product tree (batch_gcd.split_divisors)
+    2. Brent's variant of Pollard rho, for up to half of the budget
+    3. ECM (sympy) with growing B1 until the budget runs out
+
+and returns (factors, cofactor, cofactor_prime): the primes found with their
+exponents, the part of n left unfactored (1 when done) and whether that part
+is prime. Results are stored in a SQLite file keyed by a SHA-1 of n, so a
+rerun never refactors the same gcd; a partial result is retried only when
+the cache is asked with a larger budget than it was found with.
+
+Called like sympy's factorint, a FactorCache returns only the primes it has
+proven; a composite cofactor left over is never reported as a prime but
+kept in .composites, mapped to the number it came from.
+"""
+
+import hashlib
+import json
+import math
+import sqlite3
+import time
+
+from sympy import isprime, perfect_power, primerange
+from sympy.ntheory import ecm
+
+from batch_gcd import big, split_divisors, product_tree
+from prime_table import open_prime_table
+
+
+def _key(n):
+    return hashlib.sha1(n.to_bytes((n.bit_length() + 7) // 8, 'little')).hexdigest()
+
+
+def pollard_brent(n, deadline, c=1):
+    """A nontrivial factor of the odd composite n, or None at the deadline."""
+    n = big(n)
+    while time.time() < deadline:
+        y, r, q, g = big(2), 1, big(1), 1
+        x = ys = y
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(128, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(int(q), int(n))
+                k += 128
+            r *= 2
+            if time.time() > deadline:
+                return None
+        if g == n:
+            # the batched product overshot; redo the last block one step at a time
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(int(abs(x - ys)), int(n))
+        if g != n:
+            return int(g)
+        c += 1
+    return None
+
+
+def ecm_factor(n, deadline, B1=2000):
+    """A nontrivial factor of the composite n by ECM, or None at the deadline."""
+    while time.time() < deadline:
+        try:
+            found = ecm(n, B1=B1, B2=100 * B1, max_curve=8)
+        except ValueError:
+            found = set()
+        found = [p for p in found if 1 < p < n]
+        if found:
+            return min(found)
+        B1 *= 2
+    return None
+
+
+class FactorCache:
+    """
+    Time-bounded factoriser backed by an SQLite cache.
+
+    Args:
+        path: SQLite file holding earlier results
+        budget: seconds spent on rho + ECM for one number
+        trial_bound: largest prime used for trial division
+        prime_table: optional path of a shared prime table (prime_table.py)
+    """
+
+    def __init__(self, path='factor_cache.db', budget=10.0, trial_bound=10**6, prime_table=None):
+        self.budget = budget
+        self.composites = {}     # unfactored cofactor -> the n it was left of
+        if prime_table:
+            primes = open_prime_table(prime_table, trial_bound).primes(2, trial_bound + 1).tolist()
+        else:
+            primes = list(primerange(2, trial_bound + 1))
+        self.trial_tree = product_tree(primes)
+        self.db = sqlite3.connect(path)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS factors (
+                key TEXT PRIMARY KEY, factors TEXT, cofactor TEXT, budget REAL)""")
+
+    def _lookup(self, n):
+        row = self.db.execute("SELECT factors, cofactor, budget FROM factors WHERE key = ?",
+                              (_key(n),)).fetchone()
+        if row is None:
+            return None
+        factors = {int(p): e for p, e in json.loads(row[0]).items()}
+        return factors, int(row[1]), row[2]
+
+    def _store(self, n, factors, cofactor):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO factors VALUES (?, ?, ?, ?)",
+                            (_key(n), json.dumps({str(p): e for p, e in factors.items()}),
+                             str(cofactor), self.budget))
+
+    def _trial(self, n, factors):
+        """Divide out the primes <= trial_bound; returns what is left of n."""
+        found = []
+        split_divisors(math.gcd(n, int(self.trial_tree[-1][0])), self.trial_tree,
+                       len(self.trial_tree) - 1, 0, found)
+        for p in found:
+            while n % p == 0:
+                n //= p
+                factors[p] = factors.get(p, 0) + 1
+        return n
+
+    def factor(self, n):
+        """(factors, cofactor, cofactor_prime) for |n|, see the module docstring."""
+        n = abs(int(n))
+        if n < 2:
+            return {}, 1, False
+        cached = self._lookup(n)
+        if cached is not None and (cached[1] == 1 or cached[2] >= self.budget):
+            return cached[0], cached[1], isprime(cached[1])
+
+        if cached is not None:
+            factors, pending = dict(cached[0]), [cached[1]]
+        else:
+            factors = {}
+            rest = self._trial(n, factors)
+            pending = [rest] if rest > 1 else []
+
+        start = time.time()
+        unfinished = []
+        while pending:
+            m = int(pending.pop())     # perfect_power and rho may hand back mpz
+            if isprime(m):
+                factors[m] = factors.get(m, 0) + 1
+                continue
+            power = perfect_power(m)
+            if power:
+                pending.extend([power[0]] * power[1])
+                continue
+            try:
+                d = pollard_brent(m, start + self.budget / 2)
+                if d is None:
+                    d = ecm_factor(m, start + self.budget)
+            except ValueError:
+                # keep what is already split off; m stays an unfactored cofactor
+                d = None
+            if d is None:
+                unfinished.append(m)
+            else:
+                d = int(d)
+                pending.extend([d, m // d])
+
+        cofactor = math.prod(unfinished)
+        factors = dict(sorted(factors.items()))
+        self._store(n, factors, cofactor)
+        return factors, cofactor, isprime(cofactor)
+
+    def __call__(self, n):
+        """
+        factorint-style {p: e} of the proven primes of n. An unfactored
+        cofactor is not a key: it is recorded in self.composites, with a
+        warning, so it never turns up as a ladder prime.
+        """
+        factors, cofactor, _ = self.factor(n)
+        if cofactor > 1:
+            print(f"Warning: composite cofactor of {cofactor.bit_length()} bits left "
+                  f"after {self.budget}s")
+            self.composites[cofactor] = abs(int(n))
+        return factors
+
+    def close(self):
+        self.db.close()
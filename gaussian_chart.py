@@ -1,6 +1,11 @@
 import matplotlib.pyplot as plt
 import numpy as np
-from sage.all import primes, sqrt
+from character_table import character_support, character_table
+from prime_table import open_prime_table
+from residue_histogram import ResidueHistogram
+from two_squares import two_squares_batch
+
+PRIME_TABLE = 'primes.bits'  # shared sieve file, built on first use
 
 # Your actual ladder primes under 5000
 ladder_primes = [73, 103, 107, 199, 317, 421, 433, 509, 521, 547, 613, 683, 821, 823, 859, 881, 997, 1019, 1031, 1091, 1117, 1399, 1481, 1543, 1657, 1723, 1741, 1847, 1973, 2053, 2069, 2087, 2131, 2297, 2383, 2741, 2753, 2879, 2897, 3067, 3221, 3259, 3313, 3461, 3533, 3581, 3583, 3623, 3733, 3863, 3889, 3919, 4001, 4057, 4243, 4813, 4987, 5011, 5021, 5087, 5273, 5279, 5333, 5701, 5783, 5851, 5861, 6151, 6211, 6323, 6427, 6491, 6551, 6571, 6737, 6791, 7481, 7507, 7691, 7927, 8011, 8101, 8111, 8167, 8311, 8563, 8681, 8699, 9091, 9151, 9239, 9257, 9311, 9349, 9521, 9539, 9551, 9719, 9769, 9857, 9871, 9929, 10343, 10429, 10513, 10529, 10651, 10709, 10789, 10867, 11003, 11083, 11173, 11213, 11483, 11699, 11717, 11927, 12073, 12119, 12289, 12329, 12373, 12491, 12577, 13187, 13241, 13553, 13693, 13763, 13873, 14221, 14321, 14347, 14549, 14621, 14767, 14851, 15329, 15607, 15733, 16249, 16729, 16843, 17209, 17707, 18257, 19819, 20063, 20717, 20807, 21647, 22397, 22613, 23117, 23209, 24103, 24133, 24859, 25373, 25537, 25933, 26393, 27059, 27329, 27583, 28219, 29411, 30493, 32117, 33911, 35461, 35593, 36947, 37013, 67403, 91283, 124489, 2505311]
@@ -18,20 +23,14 @@ def plot_gaussian_angles():
     radii = []
     points = []
     
-    for p in ladder_primes:
-        if p % 4 == 1:
-            for a in range(1, int(sqrt(p)) + 1):
-                b2 = p - a*a
-                if b2 >= 0:
-                    b = sqrt(b2)
-                    if b.is_integer():
-                        b = int(b)
-                        if b > a:  # Your geometric constraint
-                            angle = np.arctan2(b, a)
-                            angles.append(angle)
-                            radii.append(np.sqrt(a*a + b*b))
-                            points.append((a, b, p))
-                            break
+    split_primes = [p for p in ladder_primes if p % 4 == 1]
+    squares_a, squares_b = two_squares_batch(split_primes)
+    for p, a, b in zip(split_primes, squares_a.tolist(), squares_b.tolist()):
+        if b > a:  # Your geometric constraint
+            angle = np.arctan2(b, a)
+            angles.append(angle)
+            radii.append(np.sqrt(a*a + b*b))
+            points.append((a, b, p))
     
     # Convert to degrees for plotting
     angles_deg = [a * 180 / np.pi for a in angles]
@@ -74,9 +73,7 @@ def plot_mod60_residues():
     residues = [p % 60 for p in ladder_primes]
     
     # Plot 1: Bar chart of residues
-    residue_counts = {}
-    for r in residues:
-        residue_counts[r] = residue_counts.get(r, 0) + 1
+    residue_counts = ResidueHistogram([60]).update(ladder_primes).counts(60)
     
     ax1.bar(residue_counts.keys(), residue_counts.values(), alpha=0.7, edgecolor='black')
     ax1.set_xlabel('Residue mod 60')
@@ -117,18 +114,12 @@ def plot_complex_plane():
     max_coord = 0
     points_data = []
     
-    for p in ladder_primes:
-        if p % 4 == 1:
-            for a in range(1, int(sqrt(p)) + 1):
-                b2 = p - a*a
-                if b2 >= 0:
-                    b = sqrt(b2)
-                    if b.is_integer():
-                        b = int(b)
-                        if b > a:
-                            points_data.append((a, b, p))
-                            max_coord = max(max_coord, a, b)
-                            break
+    split_primes = [p for p in ladder_primes if p % 4 == 1]
+    squares_a, squares_b = two_squares_batch(split_primes)
+    for p, a, b in zip(split_primes, squares_a.tolist(), squares_b.tolist()):
+        if b > a:
+            points_data.append((a, b, p))
+            max_coord = max(max_coord, a, b)
     
     # Plot the Gaussian integers a + bi
     for a, b, p in points_data:
@@ -168,14 +159,15 @@ def plot_complex_plane():
 def plot_hecke_comparison():
     """Compare ALL ladder primes with full Hecke character support"""
     # Get the conductor 60 character
-    chi = DirichletGroup(180)[19]  # Your proven character
+    chi = character_table(180, 19)  # Your proven character, DirichletGroup(180)[19]
     
     # Get maximum ladder prime to set our range
     max_ladder_prime = max(ladder_primes)
     
     # Get ALL primes up to the maximum ladder prime with χ(p) ≠ 0
-    all_primes_range = list(primes(max_ladder_prime + 10000))  # Go a bit beyond for context
-    hecke_support = [p for p in all_primes_range if p > 5 and chi(p) != 0]
+    limit = max_ladder_prime + 10000  # Go a bit beyond for context
+    all_primes_range = open_prime_table(PRIME_TABLE, limit).primes(2, limit)
+    hecke_support = character_support(chi, all_primes_range[all_primes_range > 5]).tolist()
     
     # Filter hecke support to only include primes ≤ max_ladder_prime for fair comparison
     hecke_support_upto_max = [p for p in hecke_support if p <= max_ladder_prime]
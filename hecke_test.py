@@ -1,86 +1,102 @@
-import cmath
+import json
 import math
 import matplotlib.pyplot as plt
+import numpy as np
+from bn_modp import powmod
 
 # ==============================================================
-# 1. Data: paste from your output (p, q, u, mod)
+# 1. Data: (p, q, u, mod) for every pair of ladder primes
 # ==============================================================
 
-raw_data = [
-    (73, 103, 5483, 7519),
-    (73, 107, 4476, 7811),
-    (73, 199, 7626, 14527),
-    (73, 317, 12182, 23141),
-    (73, 421, 291, 30733),
-    (73, 509, 17635, 37157),
-    (73, 521, 25984, 38033),
-    (103, 107, 5585, 11021),
-    (103, 199, 7651, 20497),
-    (103, 317, 19428, 32651),
-    (103, 421, 4795, 43363),
-    (103, 509, 43920, 52427),
-    (103, 521, 48864, 53663),
-    (107, 199, 7288, 21293),
-    (107, 317, 6972, 33919),
-    (107, 421, 1517, 45047),
-    (107, 509, 11794, 54463),
-    (107, 521, 49607, 55747),
-    (199, 317, 29161, 63083),
-    (199, 421, 35806, 83779),
-    (199, 509, 14412, 101291),
-    (199, 521, 89223, 103679),
-    (317, 421, 78727, 133457),
-    (317, 509, 43916, 161353),
-    (317, 521, 11744, 165157),
-    (421, 509, 74082, 214289),
-    (421, 521, 188324, 219341),
-    (509, 521, 134751, 265189)
-]
+LADDER_MAP = 'repeated_prime_map_n2_2000.json'  # written by b_n_2000.py
+
+def load_ladder(path=LADDER_MAP):
+    """{p: sorted n with p | M_n} from the b_n_2000.py output."""
+    with open(path) as f:
+        return {int(p): sorted(ns) for p, ns in json.load(f).items()}
+
+def pair_table(prime_to_n, which=0):
+    """
+    (p, q, u, mod) for all pairs p < q of ladder primes, as int64 arrays.
+
+    Each prime carries the residue r_p = (2n + 1) mod p of one of its ladder
+    indices n: `which` picks it from the sorted list (0 the first, -1 the
+    last, ...; a prime with fewer indices uses its last). No index is
+    canonical, so compare a few choices before reading much into one. u is
+    the CRT lift of (r_p mod p, r_q mod q) modulo mod = pq. Also returns the
+    row indices (i, j) of p and q in the sorted prime list. The CRT runs in
+    int64, so the primes must be below 2^31.
+    """
+    primes = np.array(sorted(prime_to_n), dtype=np.int64)
+    if primes.size and primes[-1] >= 2**31:
+        raise ValueError("pair_table needs primes below 2^31 (products of two stay in int64)")
+    def pick(ns):
+        return ns[which] if -len(ns) <= which < len(ns) else ns[-1]
+    r = np.array([(2 * pick(prime_to_n[p]) + 1) % p for p in primes.tolist()], dtype=np.int64)
+    i, j = np.triu_indices(primes.size, 1)
+    p, q = primes[i], primes[j]
+    q_inv = powmod(q % p, p - 2, p)
+    p_inv = powmod(p % q, q - 2, q)
+    mod = p * q
+    u = (r[i] * q_inv % p * q + r[j] * p_inv % q * p) % mod
+    return p, q, u, mod, i, j
 
 # ==============================================================
 # 2. Compute phase embeddings
 # ==============================================================
 
 def phase_embedding(u, mod):
-    """Map residue u mod m to a complex phase e^{2πi*u/m}."""
-    return cmath.exp(2j * math.pi * (u % mod) / mod)
-
-def hecke_phase_deviation(p, q, u, mod):
-    """Compute phase deviation between composite and product phases."""
-    # Base phases
-    phi_p = phase_embedding(p, mod)
-    phi_q = phase_embedding(q, mod)
+    """Map residue u mod m to a complex phase e^{2πi*u/m} (arrays work too)."""
+    return np.exp(2j * np.pi * (np.asarray(u) % mod) / mod)
+
+def hecke_phase_deviations(primes, u, mod, i, j):
+    """
+    Phase deviations |arg(φ(u) / (φ(p) φ(q)))| for all pairs at once.
+
+    φ(p) = e^{2πi p/pq} = e^{2πi/q}, so every prime needs one embedding
+    e^{2πi/p}, shared by all the pairs it is in.
+    """
+    embedding = np.exp(2j * np.pi / primes)
+    phi_p, phi_q = embedding[j], embedding[i]
     phi_pq = phase_embedding(u, mod)
-    # Phase deviation (radians, principal value)
-    delta = abs(cmath.phase(phi_pq / (phi_p * phi_q)))
-    return delta
+    return np.abs(np.angle(phi_pq / (phi_p * phi_q)))
 
 # ==============================================================
 # 3. Analyze all pairs
 # ==============================================================
 
-deviations = []
-for (p, q, u, mod) in raw_data:
-    delta = hecke_phase_deviation(p, q, u, mod)
-    deviations.append((p, q, delta))
+def analyze_pairs(path=LADDER_MAP, which=0, plot=True):
+    """Phase deviations for every pair of ladder primes in `path`, printed and plotted."""
+    prime_to_n = load_ladder(path)
+    primes = np.array(sorted(prime_to_n), dtype=np.int64)
+    p, q, u, mod, i, j = pair_table(prime_to_n, which)
+    deviations = hecke_phase_deviations(primes, u, mod, i, j)
 
-mean_dev = sum(d for _, _, d in deviations) / len(deviations)
-std_dev = math.sqrt(sum((d - mean_dev) ** 2 for _, _, d in deviations) / len(deviations))
+    mean_dev = float(deviations.mean())
+    std_dev = float(deviations.std())
 
-print("=== Hecke Phase Multiplicativity Analysis ===")
-for (p, q, delta) in deviations:
-    print(f"(p,q)=({p:3},{q:3})  Δphase = {delta:.6f} rad")
-print(f"\nMean Δphase = {mean_dev:.6f} rad")
-print(f"Std deviation = {std_dev:.6f} rad")
+    print("=== Hecke Phase Multiplicativity Analysis ===")
+    print(f"{primes.size} ladder primes, {deviations.size} pairs (ladder index #{which} of each prime)")
+    for a, b, delta in zip(p[:30].tolist(), q[:30].tolist(), deviations[:30].tolist()):
+        print(f"(p,q)=({a:3},{b:3})  Δphase = {delta:.6f} rad")
+    if deviations.size > 30:
+        print(f"... {deviations.size - 30} more pairs")
+    print(f"\nMean Δphase = {mean_dev:.6f} rad")
+    print(f"Std deviation = {std_dev:.6f} rad")
 
-# ==============================================================
-# 4. Optional: plot phase coherence
-# ==============================================================
+    # ==============================================================
+    # 4. Optional: plot phase coherence
+    # ==============================================================
+
+    if plot:
+        plt.figure(figsize=(8,5))
+        plt.hist(deviations, bins=max(20, int(math.sqrt(deviations.size))), color="skyblue", edgecolor="black")
+        plt.title("Hecke Phase Coherence Δφ Distribution")
+        plt.xlabel("Δφ (radians)")
+        plt.ylabel("Frequency")
+        plt.grid(True, alpha=0.3)
+        plt.show()
+    return deviations
 
-plt.figure(figsize=(8,5))
-plt.hist([d for _,_,d in deviations], bins=20, color="skyblue", edgecolor="black")
-plt.title("Hecke Phase Coherence Δφ Distribution")
-plt.xlabel("Δφ (radians)")
-plt.ylabel("Frequency")
-plt.grid(True, alpha=0.3)
-plt.show()
\ No newline at end of file
+if __name__ == "__main__":
+    analyze_pairs()
@@ -35,6 +35,8 @@ ladder_mismatches = 0
 
 # FIX: Use len(b_n) to ensure we do not index out of range.
 # The prime candidate is p = s*n + r, which is 19*n + 1 for alpha=1/19.
+# At most N_MAX candidates below |D|*N_MAX + 1 are tested, so Sage's is_prime
+# is kept here rather than the shared prime table (prime_table.py).
 for n in range(1, len(b_n)):
     p_candidate = abs(D) * n + 1
     
@@ -0,0 +1,109 @@
+"""
+Stage timers, counters and per-n telemetry for the long runs
+
+A Profile collects, for one run:
+
+    stages     wall time per named stage, from `with profile.stage(name):`
+               blocks or from wrapping a function with profile.timed(); stages
+               nest, and the self time of a stage excludes the stages inside it
+    counters   profile.count(name, k) for operation counts
+    series     profile.record(name, n, value) per index, e.g. the bit length
+               of the numerator of b_n
+
+summary() prints it as a table at the end of a run and dump() writes the same
+data as JSON, so it can tell whether the time goes to big-integer growth,
+factoring or plain Python overhead.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+
+
+class Profile:
+    """Timings, counters and series of one run."""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.stages = {}     # name -> [calls, total seconds, self seconds]
+        self.counters = {}
+        self.series = {}
+        self._stack = []     # time spent in child stages, one entry per open stage
+
+    def add(self, stage, seconds, calls=1, inner=0.0):
+        """Account `seconds` (of which `inner` in nested stages) to a stage."""
+        entry = self.stages.setdefault(stage, [0, 0.0, 0.0])
+        entry[0] += calls
+        entry[1] += seconds
+        entry[2] += seconds - inner
+
+    @contextmanager
+    def stage(self, name):
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            seconds = time.perf_counter() - start
+            inner = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += seconds
+            self.add(name, seconds, inner=inner)
+
+    def timed(self, stage, fn):
+        """fn wrapped so that every call is timed as `stage`."""
+        def wrapper(*args, **kwargs):
+            with self.stage(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    def count(self, name, k=1):
+        self.counters[name] = self.counters.get(name, 0) + k
+
+    def record(self, name, n, value):
+        self.series.setdefault(name, {})[n] = value
+
+    def wall(self):
+        return time.perf_counter() - self.started
+
+    def summary(self):
+        """Print stages by self time, then counters and a digest of every series."""
+        wall = self.wall()
+        print(f"\nProfile: {self.name} (wall {wall:.2f}s)")
+        print(f"{'stage':<32} {'calls':>8} {'total s':>10} {'self s':>10} {'% wall':>7}")
+        print("-" * 71)
+        for stage, (calls, total, own) in sorted(self.stages.items(), key=lambda kv: -kv[1][2]):
+            print(f"{stage:<32} {calls:>8} {total:10.3f} {own:10.3f} {100 * own / wall:6.1f}%")
+        untimed = wall - sum(own for _, _, own in self.stages.values())
+        print(f"{'(outside stages)':<32} {'':>8} {'':>10} {untimed:10.3f} {100 * untimed / wall:6.1f}%")
+
+        if self.counters:
+            print("\nCounters:")
+            for name, value in self.counters.items():
+                shown = f"{value:14.3f}" if isinstance(value, float) else f"{value:>14}"
+                print(f"  {name:<40} {shown}")
+        for name, values in self.series.items():
+            if not values:
+                continue
+            ns = sorted(values)
+            first, last = ns[0], ns[-1]
+            slope = (values[last] - values[first]) / (last - first) if last > first else 0.0
+            print(f"\n{name}: n = {first}..{last}, {values[first]} -> {values[last]} "
+                  f"(max {max(values.values())}, {slope:.2f} per n)")
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'wall': self.wall(),
+            'stages': {stage: {'calls': calls, 'total': total, 'self': own}
+                       for stage, (calls, total, own) in self.stages.items()},
+            'counters': dict(self.counters),
+            'series': {name: {str(n): v for n, v in sorted(values.items())}
+                       for name, values in self.series.items()},
+        }
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=4)
+        print(f"Profile written to {path}")
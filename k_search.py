@@ -1,8 +1,15 @@
+from fractions import Fraction
+from sympy import isprime
 from sage import all
+from batch_gcd import small_prime_divisors
+from factor_cache import FactorCache
+from bn_engine import numerators as bn_numerators
 
 # --- SAGE CONFIGURATION ---
 TARGET_K = 5      # <--- CHANGE THIS VALUE (e.g., 3, 4, 5, 7, 8)
 MAX_N = 30        # Keep this <= 45 for free accounts (numbers get huge)
+PRIME_BOUND = 10**6  # Screened by remainder tree; larger primes come from factoring the rest
+FACTOR_BITS = 160    # Cofactors up to this size are factored (10s each at most)
 # --------------------------
 
 def analyze_k_ladder(k, limit_n):
@@ -12,52 +19,46 @@ def analyze_k_ladder(k, limit_n):
     print(f"   Recurrence: b_n convolution with 1/(n + 1/{k})^2")
     print("-" * 50)
 
-    # 1. Setup Alpha and Coefficients
-    alpha = 1/k
-    
-    # We define the coefficients of the 'Input Signal' f(t)
-    # c_m = -1 / (m + alpha)^2
-    # We pre-compute these to save time
-    c = {}
-    for m in range(limit_n + 1):
-        c[m] = -1 / (m + alpha)^2
-
-    # 2. Initialize Reciprocal Sequence b
-    # Base case: b[0] * c[0] = 1  => b[0] = 1/c[0]
-    b = [0] * (limit_n + 1)
-    b[0] = 1 / c[0]
+    # 1. Setup Alpha (int() since k is a Sage Integer once preparsed)
+    alpha = Fraction(int(1), int(k))
     
+    # 2.-3. Numerator-only recurrence for b = 1/f, c_m = -1 / (m + alpha)^2
+    # The denominator of b_n follows the known law (bn_engine.denominator_steps),
+    # so only the scaled integer numerators are carried through the convolution
+    # and each b_n is reduced once at the end.
     ladder_primes = set()
+    numerators = []
     
-    # 3. Convolution Loop
-    for n in range(1, limit_n + 1):
-        # Convolution relation: sum_{j=0}^n b_{n-j} * c_j = 0
-        # b_n * c_0 + sum_{j=1}^n b_{n-j} * c_j = 0
-        # b_n = - ( sum_{j=1}^n b_{n-j} * c_j ) / c_0
-        
-        sum_val = 0
-        for j in range(1, n + 1):
-            sum_val += b[n-j] * c[j]
-        
-        b[n] = -sum_val / c[0]
-        
-        # 4. Factorization (The Heavy Lifting)
-        # We only factor the numerator.
-        # We assume the denominator follows the known law and ignore it.
-        num = b[n].numerator()
-        
-        # OPTIMIZATION: Don't factor if num is 1 or -1
+    for num in bn_numerators(2, alpha, limit_n)[1:]:
+        # 4. Keep the numerator for screening.
+        # OPTIMIZATION: Don't screen if num is 1 or -1
         if abs(num) > 1:
-            # We use trial division for speed on small factors, 
-            # then full factorization only if needed.
-            try:
-                factors_found = prime_factors(abs(num))
-                for p in factors_found:
-                    # Filter: Ignore primes that divide k (ramified) or are too small
-                    if p > k: 
-                        ladder_primes.add(p)
-            except:
-                print(f"   [n={n}] Numerator too large to factor quickly. Skipping.")
+            numerators.append(abs(num))
+
+    # Screen every numerator against all primes <= PRIME_BOUND at once
+    # (remainder tree, no factoring, so no numerator is ever skipped), then
+    # factor what is left of each numerator for the primes above the bound
+    # when it is prime or small enough to split
+    factorize = FactorCache('factor_cache.db', trial_bound=PRIME_BOUND)
+    too_large = 0
+    for num, factors_found in zip(numerators, small_prime_divisors(numerators, PRIME_BOUND)):
+        rest = num
+        for p in factors_found:
+            while rest % p == 0:
+                rest //= p
+        if rest > 1 and (rest.bit_length() <= FACTOR_BITS or isprime(rest)):
+            factors_found = factors_found + list(factorize(rest))
+        elif rest > 1:
+            too_large += 1
+        for p in factors_found:
+            # Filter: Ignore primes that divide k (ramified) or are too small
+            if p > k: 
+                ladder_primes.add(p)
+    factorize.close()
+    if factorize.composites or too_large:
+        print(f"   Note: {len(factorize.composites) + too_large} numerator(s) kept a composite "
+              f"cofactor above {PRIME_BOUND} (over {FACTOR_BITS} bits or not split in "
+              f"{factorize.budget}s); primes in it are missing.")
 
     # 5. Verify the 'Splitting Law'
     split_primes = []
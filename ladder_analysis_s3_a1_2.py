@@ -1,6 +1,8 @@
 
 from sage.all import *
 import numpy as np
+from cremona_index import curves_for_conductors
+from residue_histogram import ResidueHistogram
 
 # ================================================
 # COMBINED RESULTS FOR s=3, α=1/2
@@ -83,26 +85,23 @@ print("CORRECTED ELLIPTIC CURVE DATABASE CHECK")
 print("="*80)
 
 def check_elliptic_curves_for_primes(primes_list):
+    # One batch lookup in the offline Cremona index (exported on first use)
+    try:
+        found = curves_for_conductors(primes_list)
+    except ImportError:
+        print("  Cremona database not available.")
+        return
     for p in primes_list:
         print(f"\nPrime {p}:")
-        try:
-            from sage.databases.cremona import CremonaDatabase
-            cdb = CremonaDatabase()
-            labels = cdb.curves(p)
-            if labels:
-                print(f"  Found {len(labels)} curve(s) in Cremona database.")
-                for label in labels[:3]:  # Show at most 3
-                    try:
-                        E = EllipticCurve(label)
-                        print(f"    Curve {label}: rank = {E.rank()}, CM = {E.has_cm()}")
-                    except Exception as e:
-                        print(f"    Error creating curve {label}: {e}")
-            else:
-                print(f"  No curves found in Cremona database for conductor {p}.")
-        except ImportError:
-            print("  Cremona database not available.")
-        except Exception as e:
-            print(f"  Error: {e}")
+        curves = found[p]
+        if curves is None:
+            print(f"  Conductor {p} is beyond the Cremona index.")
+        elif curves:
+            print(f"  Found {len(curves)} curve(s) in Cremona database.")
+            for label, rank, cm in curves[:3]:  # Show at most 3
+                print(f"    Curve {label}: rank = {rank}, CM = {cm}")
+        else:
+            print(f"  No curves found in Cremona database for conductor {p}.")
 
 # Check the primes we are interested in
 check_elliptic_curves_for_primes([43, 67, 127, 163, 281, 331, 421, 433, 479, 641, 691, 751, 827, 857])
@@ -129,6 +128,11 @@ print("\nResidue classes mod 6:")
 for p in s3_primes:
     print(f"  {p} ≡ {p % 6} (mod 6)")
 
+# Class counts for all three moduli in one pass
+s3_histogram = ResidueHistogram([3, 4, 6]).update(s3_primes)
+for m in (4, 3, 6):
+    print(f"\nCounts mod {m}: {s3_histogram.counts(m)}")
+
 # Check Heegner primes
 heegner_primes = [2, 3, 5, 7, 11, 19, 43, 67, 163]
 print("\nHeegner primes in our list:")
@@ -0,0 +1,207 @@
+"""
+Parallel version of find_new_repeating_primes from b_n_0_mod_p.py
+
+The prime range is cut into chunks of consecutive primes, each chunk is
+searched in a worker process with the Sage-free engines of bn_modp.py, and the
+repeating primes are merged back in prime order.
+
+With a journal file every finished chunk is appended to a SQLite database as
+it completes, so a restarted sweep skips the prime ranges it already did.
+A Profile (instrumentation.py) passed as `profile` gets the stage timings,
+the sweep counters and the engine time summed over the workers.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from multiprocessing import Pool
+
+from sympy import primerange
+
+from bn_modp import fast_compute_bn_modp, zeros_mod_primes
+from instrumentation import Profile
+from prime_table import open_prime_table
+
+# The block engine is O(N^2) per prime and Newton O(N log N): on 512 primes
+# block is 3.5x faster at N=1000, 1.8x at N=2000 and already slower at N=3000
+BLOCK_MAX_N = 2500
+
+
+def check_bound(p, end_n):
+    """N_check from find_new_repeating_primes: stay below (p-1)/2."""
+    if p > 2 * end_n + 1:
+        return end_n
+    return min(end_n, (p - 1) // 2 - 1)
+
+
+def _sweep_chunk(task):
+    """Repeating primes (p, zeros) within one chunk of primes, and the engine time."""
+    chunk, start_n, end_n, engine = task
+    start = time.perf_counter()
+    chunk = [p for p in chunk if check_bound(p, end_n) >= start_n]
+    bounds = [check_bound(p, end_n) for p in chunk]
+    if engine == 'block':
+        all_zeros = zeros_mod_primes(2, '1/2', chunk, bounds, block_size=len(chunk) or 1)
+    else:
+        all_zeros = [fast_compute_bn_modp(p, N) for p, N in zip(chunk, bounds)]
+    seconds = time.perf_counter() - start
+
+    found = []
+    for p, zeros in zip(chunk, all_zeros):
+        target_zeros = [n for n in zeros if n >= start_n]
+        if len(target_zeros) >= 1:
+            pre_zeros = [n for n in zeros if n < start_n]
+            if len(pre_zeros) >= 1 or len(target_zeros) >= 2:
+                found.append((p, sorted(pre_zeros + target_zeros)))
+    return found, seconds, len(chunk)
+
+
+def prime_chunks(start_prime, prime_bound, chunk_size, table=None):
+    """
+    Consecutive primes in [start_prime, prime_bound) in lists of chunk_size,
+    read from a PrimeTable when one is given.
+    """
+    if table is not None:
+        source = (p for block in table.iter_primes(start_prime, prime_bound) for p in block.tolist())
+    else:
+        source = primerange(start_prime, prime_bound)
+    chunk = []
+    for p in source:
+        chunk.append(int(p))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class SweepJournal:
+    """
+    Append-only SQLite record of finished prime ranges [lo, hi] and the
+    repeating primes found in them, keyed by the (start_n, end_n) window.
+    """
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS ranges (
+                start_n INTEGER, end_n INTEGER, lo INTEGER, hi INTEGER, finished REAL);
+            CREATE TABLE IF NOT EXISTS repeats (
+                start_n INTEGER, end_n INTEGER, p INTEGER, zeros TEXT);
+        """)
+
+    def completed(self, start_n, end_n):
+        """Finished (lo, hi) ranges for this window."""
+        return self.db.execute(
+            "SELECT lo, hi FROM ranges WHERE start_n = ? AND end_n = ?",
+            (start_n, end_n)).fetchall()
+
+    def record(self, start_n, end_n, lo, hi, found):
+        """Append one finished range; the range row and its primes commit together."""
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO repeats VALUES (?, ?, ?, ?)",
+                [(start_n, end_n, p, json.dumps(zeros)) for p, zeros in found])
+            self.db.execute("INSERT INTO ranges VALUES (?, ?, ?, ?, ?)",
+                            (start_n, end_n, lo, hi, time.time()))
+
+    def results(self, start_n, end_n, lo, hi):
+        """Stored repeating primes with lo <= p <= hi, in prime order."""
+        rows = self.db.execute(
+            "SELECT DISTINCT p, zeros FROM repeats "
+            "WHERE start_n = ? AND end_n = ? AND p BETWEEN ? AND ? ORDER BY p",
+            (start_n, end_n, lo, hi)).fetchall()
+        return [(p, json.loads(zeros)) for p, zeros in rows]
+
+    def close(self):
+        self.db.close()
+
+
+def _covered(lo, hi, ranges):
+    return any(a <= lo and hi <= b for a, b in ranges)
+
+
+def find_new_repeating_primes(start_n=2001, end_n=5000, prime_bound=1000000, start_prime=37607,
+                              workers=None, chunk_size=512, engine='auto', journal=None,
+                              prime_table=None, profile=None):
+    """
+    Find primes whose b_n mod p vanishes at least twice with a zero in
+    [start_n, end_n], searching chunks of primes in parallel.
+
+    Args:
+        workers: number of processes (default os.cpu_count())
+        chunk_size: primes per task
+        engine: 'block' (vectorised over the chunk), 'newton' (per prime) or
+            'auto': block up to end_n = BLOCK_MAX_N, Newton above it
+        journal: optional SQLite path; finished chunks are recorded there and
+            skipped when the sweep is restarted
+        prime_table: optional path of a shared prime table (prime_table.py),
+            built on first use
+        profile: optional instrumentation.Profile to record the run in
+    """
+    profile = profile or Profile('find_new_repeating_primes')
+    with profile.stage('prime generation'):
+        table = open_prime_table(prime_table, prime_bound) if prime_table else None
+        chunks = list(prime_chunks(start_prime, prime_bound, chunk_size, table))
+    total = sum(len(c) for c in chunks)
+    print(f"Checking {total} primes for repeats in n=[{start_n}, {end_n}] "
+          f"({len(chunks)} chunks)")
+
+    store = SweepJournal(journal) if journal else None
+    done = store.completed(start_n, end_n) if store else []
+    pending = [c for c in chunks if not _covered(c[0], c[-1], done)]
+    if store:
+        print(f"Resuming: {len(chunks) - len(pending)} chunks already in {journal}")
+
+    repeating_primes = []
+    checked = 0
+    if engine == 'auto':
+        engine = 'block' if end_n <= BLOCK_MAX_N else 'newton'
+    tasks = [(chunk, start_n, end_n, engine) for chunk in pending]
+    with Pool(workers or os.cpu_count()) as pool:
+        # imap keeps chunk order, so the merged list stays sorted by prime
+        computed = pool.imap(_sweep_chunk, tasks)
+        for chunk in chunks:
+            if _covered(chunk[0], chunk[-1], done):
+                with profile.stage('journal'):
+                    found = store.results(start_n, end_n, chunk[0], chunk[-1])
+                profile.count('chunks from journal')
+            else:
+                with profile.stage('waiting for workers'):
+                    found, seconds, searched = next(computed)
+                profile.count('engine seconds (all workers)', seconds)
+                profile.count('chunks computed')
+                profile.count('primes searched', searched)
+                if store:
+                    with profile.stage('journal'):
+                        store.record(start_n, end_n, chunk[0], chunk[-1], found)
+                for p, zeros in found:
+                    print(f"New repeating prime: {p} with zeros at {zeros}")
+            checked += len(chunk)
+            repeating_primes.extend(found)
+            profile.count('repeating primes', len(found))
+            print(f"Progress: {checked}/{total} primes checked")
+
+    if store:
+        store.close()
+    return repeating_primes
+
+
+if __name__ == "__main__":
+    start_time = time.time()
+    profile = Profile('prime_sweep')
+
+    new_repeats = find_new_repeating_primes(start_n=1, end_n=1000, prime_bound=1000000, start_prime=5,
+                                            journal='repeating_primes_sweep.db', profile=profile)
+
+    end_time = time.time()
+    print(f"\nFound {len(new_repeats)} new repeating primes")
+    print(f"Time taken: {end_time - start_time:.2f} seconds")
+
+    with open('new_repeating_primes_2001_5000_extended.txt', 'w') as f:
+        for p, zeros in new_repeats:
+            f.write(f"Prime {p}: zeros at {zeros}\n")
+
+    profile.summary()
+    profile.dump('profile_prime_sweep.json')
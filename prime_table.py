@@ -0,0 +1,144 @@
+"""
+Shared on-disk prime table
+
+build_prime_table() runs a segmented sieve of Eratosthenes and writes an
+odd-only bitset (bit i <=> 2i+1 is prime) followed by cumulative prime counts
+per block, so one file up to 10^10 is about 625 MB. PrimeTable memory-maps
+that file for membership, counting and range iteration, so every sweep reads
+the same table instead of building its own list of primes.
+
+File layout: b'PRIMETBL', limit, bitset bytes, block bytes (all uint64 LE),
+then the bitset, then the uint64 cumulative counts (one per block, plus 0).
+"""
+
+import os
+
+import numpy as np
+
+MAGIC = b'PRIMETBL'
+HEADER = 32
+BLOCK_BYTES = 8192          # counting granularity: 65536 odd numbers
+
+
+def _base_primes(limit):
+    """Odd primes <= limit by a plain sieve."""
+    sieve = np.ones(limit + 1, dtype=bool)
+    sieve[:2] = False
+    for i in range(2, int(limit ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = False
+    primes = np.flatnonzero(sieve)
+    return primes[primes > 2]
+
+
+def build_prime_table(path, limit, segment_bytes=2**21):
+    """Sieve the odd numbers <= limit segment by segment into `path`."""
+    segment_bytes -= segment_bytes % BLOCK_BYTES
+    nbits = (limit + 1) // 2
+    nbytes = -(-nbits // (8 * BLOCK_BYTES)) * BLOCK_BYTES
+    base = _base_primes(int(limit ** 0.5) + 1)
+    counts = [0]
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.array([limit, nbytes, BLOCK_BYTES], dtype='<u8').tobytes())
+        for byte0 in range(0, nbytes, segment_bytes):
+            i0 = 8 * byte0
+            size = 8 * min(segment_bytes, nbytes - byte0)
+            seg = np.ones(size, dtype=bool)
+            if i0 == 0:
+                seg[0] = False                      # 1 is not prime
+            if i0 + size > nbits:
+                seg[max(0, nbits - i0):] = False    # padding past the limit
+            lo = 2 * i0 + 1
+            for p in base:
+                m = max(p * p, -(-lo // p) * p)
+                if m % 2 == 0:
+                    m += p
+                seg[(m - lo) // 2::p] = False
+            packed = np.packbits(seg, bitorder='little')
+            f.write(packed.tobytes())
+            per_block = np.unpackbits(packed, bitorder='little').reshape(-1, 8 * BLOCK_BYTES).sum(axis=1)
+            counts.extend((counts[-1] + np.cumsum(per_block)).tolist())
+        f.write(np.array(counts, dtype='<u8').tobytes())
+
+
+class PrimeTable:
+    """Read-only, memory-mapped view of a table written by build_prime_table."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            if f.read(8) != MAGIC:
+                raise ValueError(f"{path} is not a prime table")
+            self.limit, nbytes, block_bytes = np.frombuffer(f.read(24), dtype='<u8').tolist()
+        self.block_bits = 8 * block_bytes
+        self.bits = np.memmap(path, dtype=np.uint8, mode='r', offset=HEADER, shape=(nbytes,))
+        self.counts = np.memmap(path, dtype='<u8', mode='r', offset=HEADER + nbytes,
+                                shape=(nbytes // block_bytes + 1,))
+
+    def _check(self, n):
+        if n > self.limit:
+            raise ValueError(f"{n} is past the table limit {self.limit}")
+
+    def is_prime(self, n):
+        """Membership test for an int or an integer array."""
+        arr = np.asarray(n, dtype=np.int64)
+        self._check(int(arr.max(initial=0)))
+        i = np.maximum(arr - 1, 0) // 2
+        odd = ((self.bits[i >> 3] >> (i & 7)) & 1).astype(bool)
+        result = np.where(arr % 2 == 1, odd, arr == 2) & (arr > 1)
+        return bool(result) if result.ndim == 0 else result
+
+    def __contains__(self, n):
+        return self.is_prime(n)
+
+    def pi(self, x):
+        """Number of primes <= x."""
+        if x < 2:
+            return 0
+        self._check(x)
+        nbits = (x + 1) // 2
+        block = nbits // self.block_bits
+        total = int(self.counts[block])
+        start, stop = block * self.block_bits, nbits
+        if stop > start:
+            partial = np.unpackbits(self.bits[start // 8:-(-stop // 8)], bitorder='little')
+            total += int(partial[:stop - start].sum())
+        return total + 1                            # the prime 2
+
+    def count(self, lo, hi):
+        """Number of primes in [lo, hi)."""
+        hi = min(hi, self.limit + 1)
+        return self.pi(hi - 1) - self.pi(lo - 1) if hi > lo else 0
+
+    def primes(self, lo, hi):
+        """The primes in [lo, hi) as an int64 array."""
+        hi = min(hi, self.limit + 1)
+        if hi <= lo:
+            return np.zeros(0, dtype=np.int64)
+        i0, i1 = max(lo - 1, 0) // 2, hi // 2
+        byte0 = i0 // 8
+        bits = np.unpackbits(self.bits[byte0:-(-i1 // 8)], bitorder='little')
+        found = 2 * (np.flatnonzero(bits) + 8 * byte0).astype(np.int64) + 1
+        found = found[(found >= lo) & (found < hi)]
+        if lo <= 2 < hi:
+            found = np.concatenate(([2], found))
+        return found
+
+    def iter_primes(self, lo, hi, segment=2**24):
+        """Yield the primes in [lo, hi) as arrays, one segment of integers at a time."""
+        for start in range(lo, min(hi, self.limit + 1), segment):
+            block = self.primes(start, min(start + segment, hi))
+            if block.size:
+                yield block
+
+
+def open_prime_table(path, limit):
+    """Open the table at `path`, (re)building it first if it stops below limit."""
+    if os.path.exists(path):
+        table = PrimeTable(path)
+        if table.limit >= limit:
+            return table
+        del table
+    build_prime_table(path, limit)
+    return PrimeTable(path)
@@ -0,0 +1,137 @@
+"""
+Bulk p-adic valuations v_p(b_n) over a range of primes and indices
+
+valuation_table() returns a dense matrix V with V[i, j] = v_p(b_n) for
+p = primes[i], n = indices[j], computed from residues instead of big-integer
+division:
+
+  * primes p > q*N + a divide no denominator, so b_n is p-integral and the
+    block engine bn_mod_primes gives b_n mod p^K for many primes at once
+    (K as large as p^K < 2^31 allows, at most `depth`).
+  * primes p <= q*N + a can divide the denominator. With e_p(n) from the
+    denominator law (bn_engine._law_exponents) z_n = b_n * p^e_p(n) is
+    p-integral and satisfies a recurrence with p-integral coefficients, which
+    is run mod p^(e_p(N) + depth) on Python ints, one prime at a time.
+
+An entry is exact unless the residue vanished, in which case it is the lower
+bound K - e_p(n) and exact[i, j] is False. The bound is always >= 1, so zero
+tests are always decided; squarefree tests need depth >= 2.
+"""
+
+import numpy as np
+from sympy import primerange
+
+from bn_engine import _as_fraction, _law_exponents, _valuation
+from bn_modp import bn_mod_primes
+from prime_table import open_prime_table
+
+
+class ValuationTable:
+    """v_p(b_n) for p in `primes` (rows) and n in `indices` (columns)."""
+
+    def __init__(self, primes, indices, v, exact):
+        self.primes, self.indices, self.v, self.exact = primes, indices, v, exact
+
+    def zero_mod_p(self):
+        """b_n = 0 mod p: p-integral with p dividing the numerator."""
+        return self.v > 0
+
+    def in_denominator(self):
+        """p divides the denominator of b_n."""
+        return self.v < 0
+
+    def squarefree_at_p(self):
+        """Known to satisfy p^2 does not divide b_n."""
+        return (self.v < 2) & (self.exact | (self.v < 1))
+
+    def zero_lists(self):
+        """{p: [n with b_n = 0 mod p]} for the primes with at least one zero."""
+        hits = self.zero_mod_p()
+        return {int(p): self.indices[row].tolist()
+                for p, row in zip(self.primes, hits) if row.any()}
+
+
+def _depth(p, depth):
+    """Largest K <= depth with p^K < 2^31."""
+    K = 1
+    while K < depth and p ** (K + 1) < 2**31:
+        K += 1
+    return K
+
+
+def _small_prime_row(s, a, q, p, N, depth):
+    """(v, exact) over n = 0..N for a prime that may divide denominators."""
+    vq = _valuation(q, p)
+    e = _law_exponents(p, s, a, q, N) if vq == 0 else None
+    e = np.array(e if e is not None else [0] * (N + 1), dtype=np.int64) + s * vq
+    K = int(e[-1]) + depth
+    M = p ** K
+
+    # (qk + a)^s = p^(s*v_k) * u_k with u_k a unit
+    vk = np.zeros(N + 1, dtype=np.int64)
+    inv_u = np.zeros(N + 1, dtype=object)
+    for k in range(1, N + 1):
+        w = q * k + a
+        vk[k] = v = _valuation(w, p)
+        inv_u[k] = pow((w // p ** v) ** s, -1, M)
+    powers = np.array([pow(p, j, M) for j in range(K)] + [0], dtype=object)
+    a_s = a ** s % M
+
+    # z_n = b_n p^e(n) = -a^s sum_k z_{n-k} p^(e(n) - e(n-k) - s v_k) / u_k
+    z = np.zeros(N + 1, dtype=object)
+    z[0] = -a_s * pow((q // p ** vq) ** s, -1, M) % M
+    for n in range(1, N + 1):
+        ks = np.arange(1, n + 1)
+        shift = np.minimum(e[n] - e[n - ks] - s * vk[ks], K)
+        z[n] = -a_s * int(np.dot(powers[shift] * inv_u[1:n + 1], z[n - 1::-1])) % M
+
+    v = np.zeros(N + 1, dtype=np.int64)
+    exact = np.ones(N + 1, dtype=bool)
+    for n in range(N + 1):
+        if z[n] == 0:
+            v[n], exact[n] = K, False
+        else:
+            v[n] = _valuation(int(z[n]), p)
+    return v - e, exact
+
+
+def valuation_table(s, alpha, prime_lo, prime_hi, n_lo, n_hi, depth=2,
+                    prime_table=None, block_size=1024):
+    """
+    v_p(b_n) for primes prime_lo <= p < prime_hi and n_lo <= n <= n_hi.
+
+    Args:
+        depth: p-adic digits kept beyond the denominator, so valuations
+            below depth are exact (depth is capped so p^depth < 2^31)
+        prime_table: optional path of a shared prime table (prime_table.py)
+    """
+    alpha = _as_fraction(alpha)
+    a, q = alpha.numerator, alpha.denominator
+    N = n_hi
+    if prime_table:
+        primes = open_prime_table(prime_table, prime_hi).primes(prime_lo, prime_hi)
+    else:
+        primes = np.array(list(primerange(prime_lo, prime_hi)), dtype=np.int64)
+    indices = np.arange(n_lo, n_hi + 1)
+    v = np.zeros((primes.size, indices.size), dtype=np.int64)
+    exact = np.ones((primes.size, indices.size), dtype=bool)
+
+    cut = q * N + a
+    small = np.flatnonzero(primes <= cut)
+    for i in small:
+        row_v, row_exact = _small_prime_row(s, a, q, int(primes[i]), N, depth)
+        v[i], exact[i] = row_v[n_lo:], row_exact[n_lo:]
+
+    large = np.flatnonzero(primes > cut)
+    Ks = np.array([_depth(int(p), depth) for p in primes[large]], dtype=np.int64)
+    for K in np.unique(Ks):
+        rows = large[Ks == K]
+        for start in range(0, rows.size, block_size):
+            block = rows[start:start + block_size]
+            P = primes[block]
+            B = bn_mod_primes(s, alpha, P, N, power=int(K))[n_lo:].T
+            val = np.zeros(B.shape, dtype=np.int64)
+            for j in range(1, K + 1):
+                val += (B % (P ** j)[:, None] == 0)
+            v[block], exact[block] = val, val < K
+    return ValuationTable(primes, indices, v, exact)